@@ -1,23 +1,79 @@
-from langgraph.graph import StateGraph, END
-from typing import TypedDict, Annotated, Sequence
+from typing import TYPE_CHECKING, TypedDict, Annotated
 from backend.types import Resume, JobDescription
-from backend.model import Model
+from backend.model import Model, model_task, TASK_ANALYSIS, TASK_GENERATION
+from backend.ats_score import ATSScorer, ATSResult
+from backend.prompt_compiler import PromptCompiler
+from backend.structured_output import StructuredOutput
+from backend.tokens import count_tokens
+from backend import tracing
+from functools import partial
+import hashlib
 import json
+import operator
+import os
+import sqlite3
+import time
 import logging
 
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+
 class AgentState(TypedDict):
     base_resume: Resume
     job_description: JobDescription
     generated_resume: Resume | None
+    previous_resume: Resume | None
     validation_errors: list[str]
     revision_steps: list[str]
     ats_score: float
+    missing_keywords: list[str]
+    score_history: Annotated[list[float], operator.add]
+    iterations: int
+    tokens_used: Annotated[int, operator.add]
+    started_at: float
+    stop_reason: str | None
 
-def _validate_ats_compliance(state: AgentState) -> dict:
-    """Node: Validate ATS compliance using known criteria"""
+
+class RevisionBudget:
+    """Limits for the validate/analyze -> self_correct loop.
+
+    The loop stops at whichever comes first: max_iterations corrections,
+    max_seconds of wall-clock time, max_tokens estimated prompt+completion
+    tokens, an ATS score gain below min_score_delta, or a correction that
+    leaves the resume unchanged.
+    """
+
+    def __init__(self, max_iterations: int = 3, max_seconds: float = 300.0,
+                 max_tokens: int = 60000, min_score_delta: float = 1.0):
+        self.max_iterations = max_iterations
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.min_score_delta = min_score_delta
+
+    def stop_reason(self, state: AgentState) -> str | None:
+        if state["generated_resume"] is None:
+            return "generation_failed"
+        if not state["validation_errors"] and not state["revision_steps"]:
+            return "no_issues"
+        if state["iterations"] >= self.max_iterations:
+            return "max_iterations"
+        if time.time() - state["started_at"] >= self.max_seconds:
+            return "time_budget"
+        if state["tokens_used"] >= self.max_tokens:
+            return "token_budget"
+        if state["previous_resume"] is not None and (
+            state["previous_resume"].model_dump() == state["generated_resume"].model_dump()
+        ):
+            return "resume_unchanged"
+        scores = state["score_history"]
+        if len(scores) >= 2 and scores[-1] - scores[-2] < self.min_score_delta:
+            return "score_converged"
+        return None
+
+
+def _ats_findings(resume: Resume, job: JobDescription, scorer: ATSScorer) -> tuple[list[str], ATSResult]:
+    """Local ATS checks and keyword score, no LLM call."""
     errors = []
-    resume = state["generated_resume"]
-    
     # ATS validation rules
     if not resume.profile:
         errors.append("Missing summary/profile section")
@@ -25,124 +81,262 @@ def _validate_ats_compliance(state: AgentState) -> dict:
         errors.append("Insufficient skills listed")
     if not resume.experience:
         errors.append("Missing work experience section")
-    
-    return {"validation_errors": errors}
 
-def _generate_initial_version(state: AgentState, model: Model) -> dict:
+    result = scorer.score(resume, job)
+    if not scorer.passes(result):
+        errors.append(f"ATS keyword score {result.score} below {scorer.pass_score}")
+    return errors, result
+
+def _validate_ats_compliance(state: AgentState, scorer: ATSScorer) -> dict:
+    """Node: Validate ATS compliance using known criteria"""
+    resume = state["generated_resume"]
+    if resume is None:
+        return {"validation_errors": ["No generated resume to validate"]}
+
+    errors, result = _ats_findings(resume, state["job_description"], scorer)
+    return {
+        "validation_errors": errors,
+        "ats_score": result.score,
+        "missing_keywords": result.missing,
+        "score_history": [result.score],
+    }
+
+INITIAL_VERSION_INSTRUCTIONS = """
+Generate an initial ATS-optimized resume from the base resume and job description below.
+
+Requirements:
+- Use standard ATS headers: Summary, Experience, Skills, Education
+- Mirror job description keywords
+- Quantify achievements
+- Use active verbs
+- Respond with the resume as a JSON object matching the base resume fields
+"""
+
+def _generate_initial_version(state: AgentState, model: Model, compiler: PromptCompiler,
+                              structured: StructuredOutput) -> dict:
     """Node: Generate initial resume version"""
-    prompt = f"""
-    Generate initial ATS-optimized resume based on:
-    Base Resume: {state['base_resume'].json()}
-    Job Description: {state['job_description'].json()}
-    
-    Requirements:
-    - Use standard ATS headers: Summary, Experience, Skills, Education
-    - Mirror job description keywords
-    - Quantify achievements
-    - Use active verbs
+    prompt = compiler.compile(
+        INITIAL_VERSION_INSTRUCTIONS, state['base_resume'], state['job_description']
+    ).text
+
+    with model_task(TASK_GENERATION):
+        response = model._run_json(prompt, format="json")
+        resume = structured.finish(prompt, response, Resume, "agent_initial")
+    tokens = count_tokens(prompt, model.model_name) + count_tokens(response, model.model_name)
+    if resume is None:
+        logging.error("Generation error: no valid resume in model output")
+        return {"validation_errors": ["Generation failed: no valid resume in model output"], "tokens_used": tokens}
+    return {"generated_resume": resume, "tokens_used": tokens}
+
+def _analyze_job_alignment(state: AgentState, model: Model, scorer: ATSScorer) -> dict:
+    """Node: Check job requirement alignment
+
+    Runs alongside validate_ats, so it repeats the cheap local checks
+    instead of waiting for that node's results.
     """
-    
-    response = model._run(prompt)
-    try:
-        resume_dict = json.loads(response)
-        return {"generated_resume": Resume(**resume_dict)}
-    except Exception as e:
-        logging.error(f"Generation error: {e}")
-        return {"validation_errors": [f"Generation failed: {str(e)}"]}
-
-def _analyze_job_alignment(state: AgentState, model: Model) -> dict:
-    """Node: Check job requirement alignment"""
+    if state["generated_resume"] is None:
+        return {"revision_steps": []}
+    errors, result = _ats_findings(state["generated_resume"], state["job_description"], scorer)
+    # A passing local score with no validation errors needs no LLM review
+    if not errors:
+        logging.info("ATS score %s passes, skipping LLM alignment analysis", result.score)
+        return {"revision_steps": []}
+
     prompt = f"""
     Analyze alignment between generated resume and job requirements:
-    
+
     Resume: {state['generated_resume'].json()}
     Job Description: {state['job_description'].json()}
-    
+    Job keywords missing from the resume: {', '.join(result.missing) or 'none'}
+
     Identify:
     1. Missing required skills
     2. Under-quantified experiences
     3. Keyword mismatches
     4. Section priority issues
     """
-    
-    analysis = model._run(prompt)
-    return {"revision_steps": [analysis]}
 
-def _self_correct(state: AgentState, model: Model) -> dict:
+    with model_task(TASK_ANALYSIS):
+        analysis = model._run(prompt)
+    tokens = count_tokens(prompt, model.model_name) + count_tokens(analysis, model.model_name)
+    return {"revision_steps": [analysis], "tokens_used": tokens}
+
+def _self_correct(state: AgentState, model: Model, structured: StructuredOutput) -> dict:
     """Node: Perform self-correction based on errors"""
     prompt = f"""
     Correct the resume based on these issues:
     {state['validation_errors']}
     {state['revision_steps']}
-    
+
     Current resume:
     {state['generated_resume'].json()}
-    
+
     Maintain:
     - Original factual accuracy
     - ATS-friendly format
     - Job keyword alignment
     """
-    
-    response = model._run(prompt)
-    try:
-        resume_dict = json.loads(response)
-        return {"generated_resume": Resume(**resume_dict)}
-    except Exception as e:
-        logging.error(f"Correction error: {e}")
-        return {"validation_errors": [f"Correction failed: {str(e)}"]}
+
+    with model_task(TASK_GENERATION):
+        response = model._run_json(prompt, format="json")
+        resume = structured.finish(prompt, response, Resume, "agent_correction")
+    tokens = count_tokens(prompt, model.model_name) + count_tokens(response, model.model_name)
+    update = {"iterations": state["iterations"] + 1, "tokens_used": tokens}
+    if resume is None:
+        logging.error("Correction error: no valid resume in model output")
+        update["validation_errors"] = ["Correction failed: no valid resume in model output"]
+        return update
+    update["previous_resume"] = state["generated_resume"]
+    update["generated_resume"] = resume
+    return update
+
+def _schedule_revision(state: AgentState, budget: RevisionBudget) -> dict:
+    """Node: Decide whether the loop has budget and reason to run again"""
+    return {"stop_reason": budget.stop_reason(state)}
 
 def _should_revise(state: AgentState) -> str:
     """Edge: Decide if another revision is needed"""
-    if len(state["validation_errors"]) > 0 or len(state["revision_steps"]) > 0:
+    if state["stop_reason"] is None:
         return "revise"
     return "end"
 
-def create_resume_agent(model: Model) -> StateGraph:
+def create_resume_agent(model: Model, budget: RevisionBudget | None = None,
+                        scorer: ATSScorer | None = None,
+                        compiler: PromptCompiler | None = None) -> "StateGraph":
+    from langgraph.graph import StateGraph, END
+
+    budget = budget or RevisionBudget()
+    scorer = scorer or ATSScorer()
+    compiler = compiler or PromptCompiler.for_model(model)
+    structured = StructuredOutput(model)
     workflow = StateGraph(AgentState)
-    
-    # Define nodes
-    workflow.add_node("generate_initial", _generate_initial_version)
-    workflow.add_node("validate_ats", _validate_ats_compliance)
-    workflow.add_node("analyze_alignment", _analyze_job_alignment)
-    workflow.add_node("self_correct", _self_correct)
-    
-    # Define edges
+
+    nodes = {
+        "generate_initial": partial(_generate_initial_version, model=model, compiler=compiler, structured=structured),
+        "validate_ats": partial(_validate_ats_compliance, scorer=scorer),
+        "analyze_alignment": partial(_analyze_job_alignment, model=model, scorer=scorer),
+        "schedule_revision": partial(_schedule_revision, budget=budget),
+        "self_correct": partial(_self_correct, model=model, structured=structured),
+    }
+
+    # Define nodes, each traced as its own span
+    for name, node in nodes.items():
+        workflow.add_node(name, tracing.traced(f"agent.{name}")(node))
+
+    # Define edges. The local validation and the LLM analysis don't depend
+    # on each other, so they fan out in parallel and join at the scheduler.
     workflow.set_entry_point("generate_initial")
-    
-    workflow.add_edge("generate_initial", "validate_ats")
-    workflow.add_edge("validate_ats", "analyze_alignment")
+
+    checks = ["validate_ats", "analyze_alignment"]
+    for check in checks:
+        workflow.add_edge("generate_initial", check)
+        workflow.add_edge("self_correct", check)
+    workflow.add_edge(checks, "schedule_revision")
     workflow.add_conditional_edges(
-        "analyze_alignment",
+        "schedule_revision",
         _should_revise,
         {
             "revise": "self_correct",
             "end": END
         }
     )
-    workflow.add_edge("self_correct", "validate_ats")
-    
+
     return workflow
 
 class EnhancedResumeGenerator:
-    def __init__(self, model: Model):
-        self.agent = create_resume_agent(model)
+    """Runs the resume agent, optionally with a persistent checkpoint.
+
+    With a checkpoint_path, LangGraph saves the state to SQLite after every
+    step. A run for the same model, budget, base resume and job (or the
+    same explicit thread_id) that was interrupted picks up from its last
+    completed node, and one that finished returns its stored result.
+    """
+
+    def __init__(self, model: Model, budget: RevisionBudget | None = None,
+                 scorer: ATSScorer | None = None, checkpoint_path: str | None = None):
+        self.budget = budget or RevisionBudget()
+        self.scorer = scorer or ATSScorer()
+        self.checkpointer = None
+        if checkpoint_path:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+
+            directory = os.path.dirname(checkpoint_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.checkpointer = SqliteSaver(sqlite3.connect(checkpoint_path, check_same_thread=False))
+        self.agent = create_resume_agent(model, self.budget, self.scorer).compile(checkpointer=self.checkpointer)
         self.model = model
-    
-    def generate_ats_resume(self, base_resume: Resume, job_desc: JobDescription) -> Resume:
+        self.last_run_stats: dict = {}
+
+    def thread_id(self, base_resume: Resume, job_desc: JobDescription) -> str:
+        """Checkpoint thread of a run, stable across processes."""
+        payload = json.dumps([
+            self.model.model_name, vars(self.budget),
+            base_resume.model_dump(mode="json"), job_desc.model_dump(mode="json"),
+        ], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+    def generate_ats_resume(self, base_resume: Resume, job_desc: JobDescription,
+                            thread_id: str | None = None) -> Resume:
         """Execute the agentic workflow"""
         initial_state = AgentState(
             base_resume=base_resume,
             job_description=job_desc,
             generated_resume=None,
+            previous_resume=None,
             validation_errors=[],
             revision_steps=[],
-            ats_score=0.0
+            ats_score=0.0,
+            missing_keywords=[],
+            score_history=[],
+            iterations=0,
+            tokens_used=0,
+            started_at=time.time(),
+            stop_reason=None
         )
-        
-        # Execute the graph
-        for step in self.agent.stream(initial_state):
-            # Add logging/error handling here
-            logging.info(f"Agent step: {step}")
-        
-        return step["generated_resume"]
\ No newline at end of file
+
+        # A round takes three steps (checks, schedule, correction), leave room for the budget
+        config = {"recursion_limit": 3 * (self.budget.max_iterations + 2)}
+        run_input, resumed = initial_state, False
+        if self.checkpointer is not None:
+            thread_id = thread_id or self.thread_id(base_resume, job_desc)
+            config["configurable"] = {"thread_id": thread_id}
+            snapshot = self.agent.get_state(config)
+            if snapshot.next:
+                # Completed nodes, including a finished parallel branch, are not rerun.
+                # The time budget restarts with this process.
+                from langgraph.types import Command
+
+                logging.info("Resuming agent thread %s at %s", thread_id, ", ".join(snapshot.next))
+                run_input, resumed = Command(update={"started_at": time.time()}), True
+            elif snapshot.values and snapshot.values["generated_resume"] is not None:
+                logging.info("Agent thread %s already finished, using its result", thread_id)
+                run_input, resumed = None, True
+            elif snapshot.values:
+                self.checkpointer.delete_thread(thread_id)
+
+        state = initial_state
+        with tracing.span("agent.run", resumed=resumed) as span:
+            if run_input is None:
+                state = snapshot.values
+            else:
+                for state in self.agent.stream(run_input, config, stream_mode="values"):
+                    logging.info("Agent step: iteration %s, errors %s", state['iterations'], state['validation_errors'])
+            span.set(iterations=state["iterations"], stop_reason=state["stop_reason"],
+                     ats_score=state["ats_score"])
+
+        self.last_run_stats = {
+            "iterations": state["iterations"],
+            "elapsed_seconds": time.time() - initial_state["started_at"],
+            "tokens_used": state["tokens_used"],
+            "ats_score": state["ats_score"],
+            "score_history": state["score_history"],
+            "stop_reason": state["stop_reason"],
+            "resumed": resumed,
+        }
+        logging.info("Agent run stats: %s", self.last_run_stats)
+        return state["generated_resume"]
+
+    def close(self) -> None:
+        if self.checkpointer is not None:
+            self.checkpointer.conn.close()
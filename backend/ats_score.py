@@ -0,0 +1,127 @@
+from backend.types import Resume, JobDescription
+from typing import NamedTuple, Iterable
+import re
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can
+could do does doing during each either etc for from had has have having how if in into is
+it its like may more most must new not of on or other our out over own per such than that
+the their them then there these they this those through to under up upon use using very
+was we well were what when where which while who whom why will with within without work
+would you your ability able across ensure including strong good excellent knowledge
+experience experienced years year team teams role responsible responsibilities help
+""".split())
+
+
+def normalize_tokens(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        # Fold simple plurals so "APIs" matches "API"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class ATSResult(NamedTuple):
+    score: float
+    matched: list[str]
+    missing: list[str]
+
+
+class CompiledJob(NamedTuple):
+    skills: list[tuple[str, tuple[str, ...]]]
+    task_terms: list[str]
+
+
+class ATSScorer:
+    """Deterministic keyword coverage of a JobDescription by a Resume.
+
+    Resumes are indexed once into a set of token n-grams and jobs are
+    compiled once into normalized keyword tuples, so scoring a pair is a
+    handful of set lookups. The score (0-100) weights required-skill
+    coverage by skill_weight and task-keyword coverage by the rest.
+    """
+
+    def __init__(self, pass_score: float = 75.0, skill_weight: float = 0.7, max_ngram: int = 4):
+        self.pass_score = pass_score
+        self.skill_weight = skill_weight
+        self.max_ngram = max_ngram
+
+    def index_resume(self, resume: Resume) -> frozenset:
+        parts: list[str] = [resume.profile or ""]
+        parts += resume.skills or []
+        for entry in (resume.experience or []) + (resume.education or []):
+            parts += [f"{key} {value}" for key, value in entry.items()]
+        for name, description in (resume.projects or {}).items():
+            parts += [name, description]
+
+        grams = set()
+        for part in parts:
+            tokens = normalize_tokens(part)
+            for n in range(1, self.max_ngram + 1):
+                for i in range(len(tokens) - n + 1):
+                    grams.add(tuple(tokens[i:i + n]))
+        return frozenset(grams)
+
+    def compile_job(self, job: JobDescription) -> CompiledJob:
+        skills = []
+        seen = set()
+        for skill in job.required_skills or []:
+            key = tuple(normalize_tokens(skill))[:self.max_ngram]
+            if key and key not in seen:
+                seen.add(key)
+                skills.append((skill, key))
+
+        task_terms = []
+        for task in job.tasks or []:
+            for token in normalize_tokens(task):
+                if token not in STOPWORDS and len(token) > 2 and (token,) not in seen:
+                    seen.add((token,))
+                    task_terms.append(token)
+        return CompiledJob(skills, task_terms)
+
+    def score_indexed(self, resume_index: frozenset, job: CompiledJob) -> ATSResult:
+        matched, missing = [], []
+        skill_hits = 0
+        for skill, key in job.skills:
+            if key in resume_index:
+                skill_hits += 1
+                matched.append(skill)
+            else:
+                missing.append(skill)
+
+        task_hits = 0
+        for term in job.task_terms:
+            if (term,) in resume_index:
+                task_hits += 1
+                matched.append(term)
+            else:
+                missing.append(term)
+
+        coverages = []
+        if job.skills:
+            coverages.append((self.skill_weight, skill_hits / len(job.skills)))
+        if job.task_terms:
+            coverages.append((1 - self.skill_weight, task_hits / len(job.task_terms)))
+        if not coverages:
+            return ATSResult(100.0, matched, missing)
+
+        total_weight = sum(weight for weight, _ in coverages)
+        score = 100 * sum(weight * coverage for weight, coverage in coverages) / total_weight
+        return ATSResult(round(score, 2), matched, missing)
+
+    def score(self, resume: Resume, job: JobDescription) -> ATSResult:
+        return self.score_indexed(self.index_resume(resume), self.compile_job(job))
+
+    def passes(self, result: ATSResult) -> bool:
+        return result.score >= self.pass_score
+
+    def rank(self, resume: Resume, jobs: Iterable[JobDescription]) -> list[tuple[int, ATSResult]]:
+        """Score one resume against many postings, best match first."""
+        resume_index = self.index_resume(resume)
+        results = [(i, self.score_indexed(resume_index, self.compile_job(job))) for i, job in enumerate(jobs)]
+        return sorted(results, key=lambda item: item[1].score, reverse=True)
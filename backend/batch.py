@@ -0,0 +1,260 @@
+from backend.model import Model
+from backend.types import Resume, JobDescription
+from backend.resume_reader import ResumeReader
+from backend.job_parser import JobParser, job_parser_version
+from backend.job_store import JobStore, normalize_job_url
+from backend.variant_store import VariantStore
+from backend.resume_generation import ResumeGenerator
+from backend import tracing
+from typing import Callable, Any
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import logging
+
+
+_DONE = object()
+
+
+class BatchTailor:
+    """Tailor one base resume against many job links.
+
+    The base resume is parsed once. Each link then flows through three
+    stages (scrape -> parse -> generate) connected by bounded queues, each
+    stage with its own worker count. Every stage result is appended to a
+    JSONL checkpoint, so rerunning an interrupted batch picks every link up
+    from its last completed stage. With a job_store, postings parsed
+    recently are looked up in bulk before the batch starts and go straight
+    to generation. With a variant_store, tailored resumes are stored there
+    as deltas against the base and the checkpoint only references them.
+    """
+
+    def __init__(self, model: Model, resume_path: str,
+                 checkpoint_path: str = "batch_checkpoint.jsonl",
+                 scrape_workers: int = 4, parse_workers: int = 2, generate_workers: int = 2,
+                 queue_size: int = 16, use_agent: bool = False, retry_failed: bool = True,
+                 job_parser_kwargs: dict | None = None, job_store: JobStore | None = None,
+                 variant_store: VariantStore | None = None, agent_kwargs: dict | None = None):
+        self.model = model
+        self.resume_path = resume_path
+        self.checkpoint_path = checkpoint_path
+        self.scrape_workers = scrape_workers
+        self.parse_workers = parse_workers
+        self.generate_workers = generate_workers
+        self.queue_size = queue_size
+        self.use_agent = use_agent
+        self.retry_failed = retry_failed
+        self.job_parser_kwargs = job_parser_kwargs or {}
+        self.job_store = job_store
+        self.variant_store = variant_store
+        self.agent_kwargs = agent_kwargs or {}
+        self._checkpoint_lock = threading.Lock()
+
+    def load_checkpoint(self) -> dict[str, dict]:
+        """Last recorded state for every job link in the checkpoint file."""
+        state = {}
+        if not os.path.exists(self.checkpoint_path):
+            return state
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves at most one torn trailing line
+                    logging.warning("Skipping corrupt checkpoint line in %s", self.checkpoint_path)
+                    continue
+                # Merge so a later failure still remembers an earlier parse
+                state[record["job_link"]] = {**state.get(record["job_link"], {}), **record}
+        return state
+
+    def _record(self, job_link: str, stage: str, **payload: Any) -> None:
+        record = {"job_link": job_link, "stage": stage, "at": time.time(), **payload}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._checkpoint_lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _generator(self) -> Callable[[Resume, JobDescription], tuple[Resume | None, dict]]:
+        """Generate function returning the resume and that call's report.
+
+        Generators keep per-call state (last_prompt_report, last_run_stats),
+        so every generate worker thread gets its own instance.
+        """
+        local = threading.local()
+
+        if self.use_agent:
+            from backend.agent import EnhancedResumeGenerator
+
+            def generate(base: Resume, job: JobDescription) -> tuple[Resume | None, dict]:
+                if not hasattr(local, "agent"):
+                    local.agent = EnhancedResumeGenerator(self.model, **self.agent_kwargs)
+                resume = local.agent.generate_ats_resume(base, job)
+                return resume, {"agent_stats": local.agent.last_run_stats}
+            return generate
+
+        def generate(base: Resume, job: JobDescription) -> tuple[Resume | None, dict]:
+            if not hasattr(local, "generator"):
+                local.generator = ResumeGenerator(self.model)
+            generator = local.generator
+            resume = generator.resume_creation(generator._resume_generation_prompt(base, job))
+            return resume, {"prompt_report": generator.last_prompt_report}
+        return generate
+
+    def _run_stage(self, name: str, inbox: queue.Queue, outbox: queue.Queue | None,
+                   workers: int, work: Callable[[Any], Any]) -> list[threading.Thread]:
+        def worker():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    return
+                job_link = item[0]
+                try:
+                    with tracing.span(f"batch.{name}", job_link=job_link):
+                        result = work(item)
+                except Exception as e:
+                    logging.error("Batch %s failed for %s: %s", name, job_link, e)
+                    self._record(job_link, "failed", failed_stage=name, error=str(e))
+                    continue
+                if outbox is not None and result is not None:
+                    outbox.put(result)
+
+        # Workers inherit the caller's context, so their spans nest under batch.run
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(worker,),
+                             name=f"batch-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    @staticmethod
+    def _close_stage(inbox: queue.Queue, threads: list[threading.Thread]) -> None:
+        for _ in threads:
+            inbox.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    @tracing.traced("batch.run")
+    def run(self, job_links: list[str]) -> dict[str, Resume | None]:
+        checkpoint = self.load_checkpoint()
+
+        base_resume = ResumeReader(self.resume_path, self.model).parse_resume()
+        if base_resume is None:
+            raise ValueError(f"Could not parse base resume {self.resume_path}")
+
+        base_id, stored_variants = None, {}
+        if self.variant_store is not None:
+            base_id = self.variant_store.put_base(base_resume)
+            stored_variants = self.variant_store.get_many(
+                job_link for job_link, record in checkpoint.items()
+                if record["stage"] == "done" and "variant_id" in record
+            )
+
+        generate = self._generator()
+        results: dict[str, Resume | None] = {}
+        to_scrape, to_generate = [], []
+        for job_link in dict.fromkeys(job_links):
+            record = checkpoint.get(job_link)
+            stage = record["stage"] if record else None
+            if stage == "done" and "resume" in record:
+                results[job_link] = Resume(**record["resume"])
+            elif stage == "done" and job_link in stored_variants:
+                results[job_link] = stored_variants[job_link]
+            elif stage == "failed" and not self.retry_failed:
+                results[job_link] = None
+            elif record and record.get("job_description"):
+                to_generate.append((job_link, JobDescription(**record["job_description"])))
+            else:
+                to_scrape.append(job_link)
+
+        if self.job_store is not None and to_scrape:
+            version = job_parser_version(
+                self.model, self.job_parser_kwargs.get("taxonomy"), self.job_parser_kwargs.get("skill_fast_path")
+            )
+            plan = self.job_store.plan(to_scrape, version)
+            stored = self.job_store.get_many(plan["ready"])
+            ready = set()
+            for job_link in plan["ready"]:
+                entry = stored.get(normalize_job_url(job_link))
+                if entry is None:
+                    continue
+                self._record(job_link, "parsed", job_description=entry.job_description.model_dump(mode="json"))
+                to_generate.append((job_link, entry.job_description))
+                ready.add(job_link)
+            to_scrape = [job_link for job_link in to_scrape if job_link not in ready]
+            logging.info(
+                "Job store: %s postings ready, %s to refresh, %s new",
+                len(plan["ready"]), len(plan["refresh"]), len(plan["new"])
+            )
+        logging.info(
+            "Batch of %s links: %s already finished, %s resuming at generation, %s to scrape",
+            len(job_links), len(results), len(to_generate), len(to_scrape)
+        )
+
+        scrape_q = queue.Queue(maxsize=self.queue_size)
+        parse_q = queue.Queue(maxsize=self.queue_size)
+        generate_q = queue.Queue(maxsize=self.queue_size)
+        results_lock = threading.Lock()
+
+        def scrape(item):
+            job_link, = item
+            parser = JobParser(job_link, self.model, store=self.job_store, **self.job_parser_kwargs)
+            chunks = parser.scrape_job()
+            if not chunks:
+                raise ValueError("No job description content found")
+            return (job_link, parser, chunks)
+
+        def parse(item):
+            job_link, parser, chunks = item
+            job_description = parser.job_parser(chunks)
+            if job_description is None:
+                raise ValueError("Job description could not be parsed")
+            self._record(job_link, "parsed", job_description=job_description.model_dump(mode="json"))
+            return (job_link, job_description)
+
+        def generate_stage(item):
+            job_link, job_description = item
+            tailored, report = generate(base_resume, job_description)
+            if tailored is None:
+                raise ValueError("Resume generation failed")
+            if self.variant_store is not None:
+                self.variant_store.put(job_link, base_id, tailored)
+                self._record(job_link, "done", variant_id=job_link, **report)
+            else:
+                self._record(job_link, "done", resume=tailored.model_dump(mode="json"), **report)
+            with results_lock:
+                results[job_link] = tailored
+
+        scrapers = self._run_stage("scrape", scrape_q, parse_q, self.scrape_workers, scrape)
+        parsers = self._run_stage("parse", parse_q, generate_q, self.parse_workers, parse)
+        generators = self._run_stage("generate", generate_q, None, self.generate_workers, generate_stage)
+
+        # Links already parsed in an earlier run skip straight to generation.
+        # Fed from a thread so a full queue can't stall the scrape feed.
+        def feed_resumed():
+            for item in to_generate:
+                generate_q.put(item)
+        resumed_feeder = threading.Thread(target=feed_resumed, daemon=True)
+        resumed_feeder.start()
+
+        for job_link in to_scrape:
+            scrape_q.put((job_link,))
+
+        # Drain stage by stage so no item is behind a stop marker
+        self._close_stage(scrape_q, scrapers)
+        self._close_stage(parse_q, parsers)
+        resumed_feeder.join()
+        self._close_stage(generate_q, generators)
+
+        for job_link in job_links:
+            results.setdefault(job_link, None)
+        return results
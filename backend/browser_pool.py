@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from typing import Callable, Any
+import atexit
+import queue
+import threading
+import logging
+
+
+def _default_factory() -> Any:
+    # seleniumbase is slow to import, only pay for it when a browser is needed
+    from seleniumbase import Driver
+    return Driver(uc=True, headless=True)
+
+
+class DriverPool:
+    """Pool of warm browser drivers shared across JobParser instances.
+
+    Drivers are created on demand up to `size`, health-checked before being
+    handed out, and recycled after serving `max_pages` pages.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 25,
+                 factory: Callable[[], Any] = _default_factory,
+                 acquire_timeout: float | None = 120):
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._pages: dict[int, int] = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _healthy(self, driver: Any) -> bool:
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except Exception as e:
+            logging.info("Discarding unhealthy browser driver: %s", e)
+            return False
+
+    def _discard(self, driver: Any) -> None:
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.info("Error quitting browser driver: %s", e)
+
+    def _get(self) -> Any:
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        driver = self.factory()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                    with self._lock:
+                        self._pages[id(driver)] = 0
+                    return driver
+                try:
+                    driver = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise TimeoutError("No browser driver became available")
+
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    @contextmanager
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        driver = self._get()
+        failed = False
+        try:
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+                worn_out = self._pages[id(driver)] >= self.max_pages
+            if self._closed or worn_out or (failed and not self._healthy(driver)):
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = DriverPool()
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -0,0 +1,237 @@
+from backend.model import Model
+from backend.json_stream import IncrementalJSONParser
+from backend import tracing
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Callable, Iterator
+
+
+class ResponseCache:
+    """Disk-backed LLM response store with LRU/size eviction and TTLs."""
+
+    def __init__(self, path: str = os.path.join("cache", "llm_responses.sqlite3"),
+                 max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024,
+                 ttl: float | None = 7 * 24 * 3600):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses(created_at)")
+        self._conn.commit()
+        # Running totals, so a put never has to aggregate the whole table
+        self._count, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    @staticmethod
+    def make_key(model_name: str, params: dict, prompt: str) -> str:
+        payload = json.dumps(
+            {"model": model_name, "params": params, "prompt": prompt},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, size, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._delete([(key, size)])
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            logging.warning("Response of %s bytes exceeds cache size limit, not cached", size)
+            return
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            if old is None:
+                self._count += 1
+                self._bytes += size
+            else:
+                self._bytes += size - old[0]
+            self._evict()
+            self._conn.commit()
+
+    def _delete(self, rows: list[tuple[str, int]]) -> None:
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in rows])
+        self._count -= len(rows)
+        self._bytes -= sum(size for _, size in rows)
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            expired = self._conn.execute(
+                "SELECT key, size FROM responses WHERE created_at < ?", (time.time() - self.ttl,)
+            ).fetchall()
+            self._delete(expired)
+            self.expirations += len(expired)
+
+        # Drop least recently used entries until both bounds hold again;
+        # each batch reads only the rows it removes, off the accessed_at index
+        while self._count > self.max_entries or self._bytes > self.max_bytes:
+            stale = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT ?",
+                (max(self._count - self.max_entries, 1),)
+            ).fetchall()
+            if not stale:
+                break
+            self._delete(stale)
+            self.evictions += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._count, self._bytes = 0, 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._count, self._bytes
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedModel(Model):
+    """Wraps any Model and serves exact repeat prompts from a ResponseCache."""
+
+    def __init__(self, model: Model, cache: ResponseCache | None = None):
+        self.model = model
+        self.cache = cache or ResponseCache()
+        self.model_name = model.model_name or type(model).__name__
+        self.params = model.params
+        self.context_window = model.context_window
+
+    def _warm(self) -> None:
+        self.model._warm()
+
+    def _run(self, input) -> str:
+        key = ResponseCache.make_key(self.model_name, self.params, str(input))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        response = self.model._run(input)
+        if isinstance(response, str):
+            self.cache.put(key, response)
+        return response
+
+    def _stream_key(self, input, format: str | None) -> str:
+        params = {**self.params, "format": format} if format else self.params
+        return ResponseCache.make_key(self.model_name, params, str(input))
+
+    def _cached(self, key: str) -> str | None:
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.info("LLM cache hit for %s (%s)", self.model_name, key[:12])
+            tracing.add("cache_hits")
+        return cached
+
+    def _stream(self, input, format: str | None = None) -> Iterator[str]:
+        key = self._stream_key(input, format)
+        cached = self._cached(key)
+        if cached is not None:
+            yield cached
+            return
+
+        pieces = []
+        stream = self.model._stream(input, format=format)
+        try:
+            for piece in stream:
+                pieces.append(piece)
+                yield piece
+        finally:
+            stream.close()
+        # Only reached when the stream ran to the end; a consumer that closed
+        # it early may have seen a truncated completion
+        self.cache.put(key, "".join(pieces))
+
+    def _run_json(self, input, on_field: Callable[[str, Any], None] | None = None,
+                  format: str | None = None) -> str:
+        key = self._stream_key(input, format)
+        cached = self._cached(key)
+        parser = IncrementalJSONParser()
+        if cached is not None:
+            for field, value in parser.feed(cached):
+                if on_field:
+                    on_field(field, value)
+            return parser.json_text
+
+        pieces = []
+        stream = self.model._stream(input, format=format)
+        try:
+            for piece in stream:
+                pieces.append(piece)
+                for field, value in parser.feed(piece):
+                    if on_field:
+                        on_field(field, value)
+                if parser.done:
+                    break
+            else:
+                self.cache.put(key, "".join(pieces))
+                return parser.json_text
+        finally:
+            # Closing the stream drops the connection, which stops generation
+            stream.close()
+        # Stopped early because the root object closed, so what was cut off
+        # is text after it that the caller never reads
+        self.cache.put(key, parser.json_text)
+        return parser.json_text
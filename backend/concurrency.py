@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, Any
+import contextvars
+import time
+
+
+def bounded_map(fn: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 4,
+                timeout: float | None = None) -> list[Any]:
+    """Run fn over items on at most max_workers threads.
+
+    Results come back in input order. An item that raised, or ran longer than
+    timeout seconds, gets its exception in its slot instead of a value, so one
+    bad item never sinks the rest.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results: list[Any] = [None] * len(items)
+    started: dict[int, float] = {}
+
+    def call(index: int, item: Any) -> Any:
+        started[index] = time.monotonic()
+        return fn(item)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    try:
+        # Each item runs in a copy of the caller's context, so context
+        # variables such as the current trace span carry over to the workers
+        futures = {
+            executor.submit(contextvars.copy_context().run, call, i, item): i
+            for i, item in enumerate(items)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=min(timeout, 0.05) if timeout else None,
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+
+            if timeout:
+                now = time.monotonic()
+                for future in list(pending):
+                    index = futures[future]
+                    if index in started and now - started[index] > timeout:
+                        # The worker thread cannot be interrupted, only abandoned
+                        future.cancel()
+                        pending.discard(future)
+                        results[index] = TimeoutError(f"Item {index} exceeded {timeout}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
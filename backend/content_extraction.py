@@ -0,0 +1,250 @@
+from typing import NamedTuple
+from urllib.parse import urlparse
+import json
+import re
+
+
+# Never part of a posting's text
+NON_CONTENT_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe", "canvas",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+)
+
+# Tags that start a new line in the extracted text
+BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "dd", "dt", "table",
+))
+
+# Class/id words of page chrome, unless the same attribute also looks like content
+_BOILERPLATE_RE = re.compile(
+    r"cookie|consent|gdpr|banner|similar|related|recommend|people-also|also-viewed|"
+    r"sidebar|footer|navbar|breadcrumb|share|social|newsletter|subscribe|signup|sign-in|"
+    r"login|modal|popup|promo|advert|\bads?\b|skip-link|app-download"
+)
+_CONTENT_RE = re.compile(r"job|posting|description|content|article|main|details|body|title")
+
+# Posting containers on common job boards, matched by host suffix. Every
+# selector's matches are kept, in order, so title and company come first.
+SITE_SELECTORS: dict[str, tuple[str, ...]] = {
+    "linkedin.com": (
+        ".top-card-layout__title", ".topcard__org-name-link", ".topcard__flavor--bullet",
+        ".show-more-less-html__markup", ".jobs-description__content",
+    ),
+    "indeed.com": (
+        ".jobsearch-JobInfoHeader-title", '[data-testid="inlineHeader-companyName"]',
+        "#jobDescriptionText",
+    ),
+    "greenhouse.io": (".app-title", ".company-name", "#content", ".job__description"),
+    "lever.co": (".posting-headline", ".posting-page .section-wrapper"),
+    "myworkdayjobs.com": (
+        '[data-automation-id="jobPostingHeader"]', '[data-automation-id="jobPostingDescription"]',
+    ),
+    "ashbyhq.com": ("h1", '[class*="descriptionText"]'),
+    "smartrecruiters.com": (".job-title", ".job-sections"),
+    "glassdoor.com": ('[data-test="job-title"]', '[class*="JobDetails_jobDescription"]'),
+    "stepstone.de": ('[data-at="header-job-title"]', '[data-at="job-ad-content"]'),
+    "welcometothejungle.com": ("h2", '[data-testid="job-section-description"]'),
+    "wellfound.com": ("h1", '[class*="description"]'),
+}
+
+# Shorter text than this is treated as a miss and the next strategy is tried
+MIN_CONTENT_CHARS = 200
+
+
+class ExtractedContent(NamedTuple):
+    text: str
+    # json_ld, site:<host>, density or full_page
+    method: str
+
+
+def _parse(html: str):
+    import lxml.html
+
+    parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+    # Bytes, because lxml rejects str input that carries an encoding declaration
+    return lxml.html.fromstring(html.encode("utf-8", "replace"), parser=parser)
+
+
+def _block_text(root) -> str:
+    """Element text with block elements on their own lines."""
+    from lxml import etree
+
+    parts = []
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        block = el.tag in BLOCK_TAGS
+        if event == "start":
+            if block:
+                parts.append("\n")
+            if el.text:
+                parts.append(el.text)
+        else:
+            if block:
+                parts.append("\n")
+            if el.tail and el is not root:
+                parts.append(el.tail)
+    lines = (re.sub(r"\s+", " ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _json_ld_postings(root) -> list[dict]:
+    postings = []
+    for script in root.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or "")
+        except json.JSONDecodeError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                kind = item.get("@type")
+                if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                    postings.append(item)
+                stack.extend(item.get("@graph", []) if isinstance(item.get("@graph"), list) else [])
+    return postings
+
+
+def _from_json_ld(posting: dict) -> str:
+    import lxml.html
+
+    organization = posting.get("hiringOrganization")
+    locations = posting.get("jobLocation")
+    locations = locations if isinstance(locations, list) else [locations]
+    places = []
+    for location in locations:
+        address = location.get("address") if isinstance(location, dict) else None
+        if isinstance(address, dict):
+            places.append(", ".join(
+                str(address[key]) for key in ("addressLocality", "addressRegion", "addressCountry")
+                if isinstance(address.get(key), str)
+            ))
+    header = [
+        posting.get("title"),
+        organization.get("name") if isinstance(organization, dict) else organization,
+        "; ".join(place for place in places if place),
+        posting.get("employmentType") if isinstance(posting.get("employmentType"), str) else None,
+    ]
+    description = posting.get("description") or ""
+    if "<" in description:
+        description = _block_text(lxml.html.fragment_fromstring(description, create_parent="div"))
+    return "\n".join([line for line in header if isinstance(line, str) and line] + [description])
+
+
+def _site_selectors(url: str | None) -> tuple[str, tuple[str, ...]] | None:
+    host = (urlparse(url).hostname or "") if url else ""
+    for suffix, selectors in SITE_SELECTORS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return suffix, selectors
+    return None
+
+
+def _from_selectors(root, selectors: tuple[str, ...]) -> str:
+    seen = set()
+    texts = []
+    for selector in selectors:
+        for el in root.cssselect(selector):
+            # Skip matches nested in something already taken
+            if any(ancestor in seen for ancestor in el.iterancestors()) or el in seen:
+                continue
+            seen.add(el)
+            text = _block_text(el)
+            if text:
+                texts.append(text)
+    return "\n".join(texts)
+
+
+def _drop_boilerplate(root) -> None:
+    chrome = []
+    for el in root.iter():
+        if not isinstance(el.tag, str) or el.tag in ("html", "body"):
+            continue
+        attrs = f"{el.get('class', '')} {el.get('id', '')} {el.get('role', '')}".lower()
+        if attrs.strip() and _BOILERPLATE_RE.search(attrs) and not _CONTENT_RE.search(attrs):
+            chrome.append(el)
+    for el in chrome:
+        if el.getparent() is not None:
+            el.drop_tree()
+
+
+def _from_density(root, min_chars: int) -> str | None:
+    """Readability-style pick of the element holding most of the prose."""
+    scores: dict = {}
+    for el in root.iter("p", "li", "pre", "td", "dd", "blockquote", "div"):
+        if el.tag == "div":
+            # Only divs holding text directly, as in <div>line<br>line</div>
+            own = (el.text or "") + "".join(child.tail or "" for child in el)
+            length = len(own.strip())
+        else:
+            length = len(el.text_content().strip())
+        if length < 25:
+            continue
+        score = 1 + el.text_content().count(",") + min(length // 100, 3)
+        parent = el.getparent()
+        if el.tag == "div":
+            scores[el] = scores.get(el, 0) + score
+        if parent is not None:
+            scores[parent] = scores.get(parent, 0) + score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + score / 2
+    if not scores:
+        return None
+
+    def final_score(el) -> float:
+        text_length = len(el.text_content()) or 1
+        link_length = sum(len(a.text_content()) for a in el.iter("a"))
+        bonus = 1.25 if el.tag in ("article", "main") or el.get("role") == "main" else 1.0
+        return scores[el] * (1 - link_length / text_length) * bonus
+
+    best = max(scores, key=final_score)
+    text = _block_text(best)
+    if len(text) < min_chars:
+        return None
+    # Title and company usually sit in a header block above the description
+    title = next(iter(root.iter("h1")), None)
+    if title is not None and best not in title.iterancestors():
+        header = title.getparent()
+        heading = _block_text(header) if header is not None else ""
+        if not heading or len(heading) > 300 or best in header.iterancestors():
+            heading = _block_text(title)
+        if heading and not text.startswith(heading):
+            text = f"{heading}\n{text}"
+    return text
+
+
+def extract_main_content(html: str, url: str | None = None,
+                         min_chars: int = MIN_CONTENT_CHARS) -> ExtractedContent:
+    """Text of the job posting in a page, without the page chrome around it.
+
+    Tries, in order: schema.org JobPosting JSON-LD, selectors for the job
+    board the url belongs to, and a link-density weighted pick of the main
+    content block. Falls back to the whole page minus obvious boilerplate.
+    """
+    if not html or not html.strip():
+        return ExtractedContent("", "full_page")
+    root = _parse(html)
+
+    for posting in _json_ld_postings(root):
+        text = _from_json_ld(posting)
+        if len(text) >= min_chars:
+            return ExtractedContent(text, "json_ld")
+
+    for el in root.xpath("|".join(f"//{tag}" for tag in NON_CONTENT_TAGS)):
+        if el.getparent() is not None:
+            el.drop_tree()
+
+    site = _site_selectors(url)
+    if site is not None:
+        host, selectors = site
+        text = _from_selectors(root, selectors)
+        if len(text) >= min_chars:
+            return ExtractedContent(text, f"site:{host}")
+
+    _drop_boilerplate(root)
+    text = _from_density(root, min_chars)
+    if text is not None:
+        return ExtractedContent(text, "density")
+    return ExtractedContent(_block_text(root), "full_page")
@@ -0,0 +1,117 @@
+from backend.model import Model
+from typing import Callable, Iterator
+import asyncio
+import random
+import threading
+import time
+
+
+def _empty_responder(prompt: str) -> str:
+    return "{}"
+
+
+class FakeModel(Model):
+    """Deterministic in-process Model, for benchmarks and offline runs.
+
+    Every completion is `responder(prompt)` and takes `latency` seconds;
+    streamed completions come in `stream_chunk`-character pieces,
+    `token_latency` seconds apart. Calls and prompt/completion sizes are
+    counted so callers can report LLM work next to wall-clock time.
+
+    To stand in for a routed backend, a call fails with ConnectionError at
+    `failure_rate`, and a model that is not loaded pays `cold_start`
+    seconds first. Once loaded, by a call or by `_warm()`, it stays loaded
+    until idle for `keep_alive` seconds (None: forever).
+    """
+
+    def __init__(self, responder: Callable[[str], str] = _empty_responder,
+                 latency: float = 0.0, token_latency: float = 0.0,
+                 stream_chunk: int = 16, model_name: str = "fake",
+                 max_concurrency: int = 4, context_window: int = 8192,
+                 failure_rate: float = 0.0, cold_start: float = 0.0,
+                 keep_alive: float | None = None, seed: int | None = None):
+        self.model_name = model_name
+        self.params = {}
+        self.responder = responder
+        self.latency = latency
+        self.token_latency = token_latency
+        self.stream_chunk = stream_chunk
+        self.max_concurrency = max_concurrency
+        self.context_window = context_window
+        self.failure_rate = failure_rate
+        self.cold_start = cold_start
+        self.keep_alive = keep_alive
+        self._random = random.Random(seed)
+        self._last_used = None
+        self.calls = 0
+        self.failures = 0
+        self.loads = 0
+        self.prompt_chars = 0
+        self.completion_chars = 0
+        self._lock = threading.Lock()
+
+    def _load_delay(self) -> float:
+        # Seconds this call waits for the model to load, and mark it used
+        now = time.monotonic()
+        with self._lock:
+            loaded = self._last_used is not None and (
+                self.keep_alive is None or now - self._last_used <= self.keep_alive
+            )
+            self._last_used = now
+            if loaded or not self.cold_start:
+                return 0.0
+            self.loads += 1
+            return self.cold_start
+
+    def _warm(self) -> None:
+        delay = self._load_delay()
+        if delay:
+            time.sleep(delay)
+
+    def _delay(self) -> float:
+        return self._load_delay() + self.latency
+
+    def _complete(self, input) -> str:
+        prompt = str(input)
+        with self._lock:
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        if failed:
+            raise ConnectionError(f"{self.model_name} failed")
+        response = self.responder(prompt)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            self.completion_chars += len(response)
+        return response
+
+    def _run(self, input) -> str:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._complete(input)
+
+    def _stream(self, input, format: str | None = None) -> Iterator[str]:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        response = self._complete(input)
+        for i in range(0, len(response), self.stream_chunk):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield response[i:i + self.stream_chunk]
+
+    async def _arun(self, input) -> str:
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._complete(input)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.failures = 0
+            self.loads = 0
+            self.prompt_chars = 0
+            self.completion_chars = 0
@@ -0,0 +1,172 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+from typing import Callable
+import argparse
+import json
+import threading
+import time
+
+
+def _default_responder(prompt: str) -> str:
+    return "{}"
+
+
+class FakeOllamaServer:
+    """Local stand-in for the Ollama HTTP API, for exercising OssModel offline.
+
+    Serves /api/generate and /api/tags. Every completion takes `latency` seconds
+    and is produced by `responder(prompt)`; streamed completions are sent in
+    `stream_chunk`-character pieces, `token_latency` seconds apart. When more
+    than `capacity` requests are in flight the server answers 503, like an
+    overloaded backend.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 responder: Callable[[str], str] = _default_responder,
+                 capacity: int | None = None, stream_chunk: int = 8,
+                 token_latency: float = 0.0):
+        self.latency = latency
+        self.responder = responder
+        self.capacity = capacity
+        self.stream_chunk = stream_chunk
+        self.token_latency = token_latency
+        self.requests = 0
+        self.rejected = 0
+        self.disconnected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream_completion(self, model: str, completion: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                size = max(1, server.stream_chunk)
+                pieces = [completion[i:i + size] for i in range(0, len(completion), size)]
+                try:
+                    for piece in pieces:
+                        if server.token_latency:
+                            time.sleep(server.token_latency)
+                        line = {
+                            "model": model,
+                            "created_at": datetime.now(timezone.utc).isoformat(),
+                            "response": piece,
+                            "done": False,
+                        }
+                        self.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+                    final = {
+                        "model": model,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "response": "",
+                        "done": True,
+                        "done_reason": "stop",
+                    }
+                    self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client stopped reading, like a real server we stop generating
+                    with server._lock:
+                        server.disconnected += 1
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": "fake", "model": "fake"}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                with server._lock:
+                    server.requests += 1
+                    if server.capacity is not None and server.in_flight >= server.capacity:
+                        server.rejected += 1
+                        overloaded = True
+                    else:
+                        server.in_flight += 1
+                        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                        overloaded = False
+                if overloaded:
+                    self._send_json(503, {"error": "server busy"})
+                    return
+
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    completion = server.responder(request.get("prompt", ""))
+                    if request.get("stream", True):
+                        self._stream_completion(request.get("model", "fake"), completion)
+                        return
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+                self._send_json(200, {
+                    "model": request.get("model", "fake"),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "response": completion,
+                    "done": True,
+                    "done_reason": "stop",
+                })
+
+        return Handler
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--capacity", type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeOllamaServer(port=args.port, latency=args.latency, capacity=args.capacity)
+    print(f"Fake Ollama listening on {fake.url}")
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake._httpd.server_close()
@@ -1,209 +1,565 @@
 from backend.types import JobDescription
-from backend.model import Model
-from bs4 import BeautifulSoup
-import re 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
-from langchain.prompts import PromptTemplate
-import spacy
-import numpy as np
-from seleniumbase import Driver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from backend.model import Model, model_task, TASK_EXTRACTION
+from backend.concurrency import bounded_map
+from backend.browser_pool import DriverPool, get_driver_pool
+from backend.job_store import JobStore
+from backend.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy, merge_skills
+from backend.structured_output import StructuredOutput, normalize_job
+from backend import tracing
+from backend.logging_config import log_artifact
+from backend.content_extraction import extract_main_content
+from backend.tokens import count_tokens
+from typing import Callable, Any
+from functools import partial
 import time
-import json
-import os 
+import random
+import asyncio
+import threading
 import logging
-from datetime import datetime
 
+# Heavy dependencies (spaCy, numpy, lxml, selenium, requests, langchain)
+# are imported where they are first needed, so importing this module stays
+# cheap for callers that never scrape or filter.
 
-if not os.path.exists('logs'):
-    os.makedirs('logs')
+# Words that show up in almost every real job posting body
+JOB_CONTENT_MARKERS = (
+    "responsibilit", "requirement", "qualification", "experience",
+    "skills", "apply", "role", "job description", "what you'll do", "about the job"
+)
 
-current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_filename = os.path.join('logs', f"log_job_parser_{current_time}.log")
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_http_session = None
+
+# Define key semantic concepts for job description
+KEY_CONCEPTS = [
+    "skills", "requirements", "responsibilities", 
+    "tasks", "qualifications", "job description"
+]
+
+# Fixed-size splitting used before chunks were packed to the context window;
+# still computed to report what packing saves
+FIXED_CHUNK_CHARS = 2000
+FIXED_CHUNK_OVERLAP = 200
+SPLIT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+# Floor for the posting text per chunk prompt on tiny context windows
+MIN_CHUNK_TOKENS = 256
+
+# Only tok2vec is needed to get document vectors out of the small models
+_VECTOR_PIPES = ("tok2vec",)
+
+_nlp = None
+_nlp_loaded = False
+_concept_matrices: dict = {}
+_nlp_lock = threading.Lock()
+
+
+def _get_http_session():
+    global _http_session
+    if _http_session is None:
+        import requests
+        session = requests.Session()
+        session.headers.update(HTTP_HEADERS)
+        _http_session = session
+    return _http_session
+
+
+def _load_nlp():
+    # spaCy models are expensive to load, share one per process
+    global _nlp, _nlp_loaded
+    with _nlp_lock:
+        if not _nlp_loaded:
+            try:
+                import spacy
+                _nlp = spacy.load("en_core_web_sm")
+            except (ImportError, OSError):
+                logging.warning("spaCy model not found. Please download 'en_core_web_sm'")
+                _nlp = None
+            _nlp_loaded = True
+        return _nlp
+
+
+def _unused_pipes(nlp) -> list[str]:
+    return [name for name in nlp.pipe_names if name not in _VECTOR_PIPES]
+
+
+def _normalize_rows(matrix):
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _concept_matrix(nlp):
+    import numpy as np
+    with _nlp_lock:
+        if id(nlp) not in _concept_matrices:
+            docs = nlp.pipe(KEY_CONCEPTS, disable=_unused_pipes(nlp))
+            _concept_matrices[id(nlp)] = _normalize_rows(np.vstack([doc.vector for doc in docs]))
+        return _concept_matrices[id(nlp)]
+
+
+def _job_parsing_prompt(chunk: str, with_skills: bool = True) -> str:
+    # Skills already tagged from the page text need not be generated again
+    skills_key = '''
+            "required_skills": ["skill1", "skill2", ...],''' if with_skills else ""
+    prompt = f"""
+        You are an expert job description parser. Extract details from this job description chunk:
+
+        Chunk:
+        {chunk}
+
+        IMPORTANT: If you find relevant information, update the JSON. 
+        If not in this chunk, leave fields as they are.
+
+        Provide the output as JSON with these keys:
+        {{
+            "job_poster": "string (company name)",
+            "job_title": "string",{skills_key}
+            "tasks": ["task1", "task2", ...]
+            "profile" : "string profile required for the job"
+        }}
+
+        If no new information is found, return the existing JSON or empty values.
+        """
+    return prompt
+
+
+def job_parser_version(model: Model, taxonomy: SkillTaxonomy | None = None,
+                       skill_fast_path: int | None = None) -> str:
+    # Changes whenever the chunk prompts, the skill taxonomy or the model
+    # (including its context window, which decides the chunking) change
+    taxonomy = taxonomy or get_skill_taxonomy()
+    template = "\0".join((
+        _job_parsing_prompt("{chunk}"), _job_parsing_prompt("{chunk}", with_skills=False),
+        taxonomy.version, str(skill_fast_path), str(model.context_window),
+    ))
+    return JobStore.make_version(template, model.model_name)
 
-logging.basicConfig(
-    level=logging.INFO,
-    filename=log_filename,
-    filemode='w',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
 class JobParser:
 
-    def __init__(self,job_link:str,model:Model):
+    def __init__(self,job_link:str,model:Model,max_workers:int=4,chunk_timeout:float|None=120,
+                 driver_pool:DriverPool|None=None,http_first:bool=True,http_timeout:float=10,
+                 min_content_chars:int=500,human_delay:tuple[float,float]|None=None,
+                 semantic_threshold:float=0.5,semantic_top_k:int|None=None,semantic_batch_size:int=32,
+                 on_field:Callable[[str,Any],None]|None=None,store:JobStore|None=None,
+                 taxonomy:SkillTaxonomy|None=None,skill_fast_path:int|None=None,
+                 completion_tokens:int=1024,max_chunk_tokens:int|None=None,chunk_overlap:float=0.1):
         self.job_link = job_link 
         self.model = model 
-        self.driver = Driver(uc=True,headless=True)
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            logging.warning("spaCy model not found. Please download 'en_core_web_sm'")
-            self.nlp = None
+        self.structured = StructuredOutput(model)
+        self.max_workers = max_workers
+        self.chunk_timeout = chunk_timeout
+        self.driver_pool = driver_pool or get_driver_pool()
+        self.http_first = http_first
+        self.http_timeout = http_timeout
+        self.min_content_chars = min_content_chars
+        # Optional (min, max) pause after page load to mimic human browsing
+        self.human_delay = human_delay
+        self.semantic_threshold = semantic_threshold
+        self.semantic_top_k = semantic_top_k
+        self.semantic_batch_size = semantic_batch_size
+        # Called from worker threads with each chunk's fields as they stream in
+        self.on_field = on_field
+        self.store = store
+        # Cleaned text of the last scraped page, for change detection
+        self.page_text: str | None = None
+        self.taxonomy = taxonomy or get_skill_taxonomy()
+        # With at least this many skills tagged in the text, chunk prompts
+        # stop asking the LLM for required_skills
+        self.skill_fast_path = skill_fast_path
+        # Chunks are sized so prompt, chunk and completion_tokens fit the
+        # model's context window, capped at max_chunk_tokens if given
+        self.completion_tokens = completion_tokens
+        self.max_chunk_tokens = max_chunk_tokens
+        # Overlap between map-reduce chunks, as a fraction of the chunk size
+        self.chunk_overlap = chunk_overlap
+        # Calls and prompt tokens of the last split_text() against fixed chunking
+        self.last_chunking_report: dict | None = None
         
         # Setup Langchain text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=2000,
-            chunk_overlap=200,
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        self._fixed_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=FIXED_CHUNK_CHARS,
+            chunk_overlap=FIXED_CHUNK_OVERLAP,
             length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+            separators=SPLIT_SEPARATORS
         )
-        
 
+    @property
+    def nlp(self):
+        return _load_nlp()
 
+    @property
+    def parser_version(self) -> str:
+        return job_parser_version(self.model, self.taxonomy, self.skill_fast_path)
+
+    def _fresh_stored_job(self) -> JobDescription | None:
+        if self.store is None:
+            return None
+        entry = self.store.get(self.job_link)
+        if (entry is not None and self.store.is_fresh(entry)
+                and entry.job_description is not None and entry.version == self.parser_version):
+            logging.info("Fresh parsed job found in store for %s", self.job_link)
+            tracing.annotate(store="fresh")
+            return entry.job_description
+        return None
+
+    def _record_page(self) -> tuple[str | None, JobDescription | None]:
+        """Store the scraped text; an unchanged page gets its earlier parse back."""
+        if self.store is None or self.page_text is None:
+            return None, None
+        previous = self.store.get(self.job_link)
+        content_hash, changed = self.store.put_page(self.job_link, self.page_text)
+        if (not changed and previous is not None and previous.job_description is not None
+                and previous.version == self.parser_version):
+            logging.info("Job page unchanged since last parse for %s", self.job_link)
+            tracing.annotate(store="unchanged")
+            return content_hash, previous.job_description
+        return content_hash, None
+
+    def _count_tokens(self, text: str) -> int:
+        return count_tokens(text, self.model.model_name)
+
+    @property
+    def chunk_token_budget(self) -> int:
+        """Tokens of posting text that fit in one chunk prompt."""
+        overhead = self._count_tokens(_job_parsing_prompt(""))
+        budget = self.model.context_window - overhead - self.completion_tokens
+        if self.max_chunk_tokens:
+            budget = min(budget, self.max_chunk_tokens)
+        return max(budget, MIN_CHUNK_TOKENS)
+
+    def split_text(self, text: str) -> list[str]:
+        """Pack page text into as few chunk prompts as the context window allows.
+
+        A posting that fits goes out whole, in a single call. Longer pages
+        are split on paragraph and line breaks into chunks just under the
+        budget, parsed in parallel and merged locally (map-reduce).
+        """
+        if not text:
+            self.last_chunking_report = None
+            return []
+        budget = self.chunk_token_budget
+        tokens = self._count_tokens(text)
+        if tokens <= budget:
+            chunks = [text]
+        else:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            # Sized in characters at this text's own chars-per-token ratio, so
+            # the text is tokenized once; 5% slack for uneven density
+            chunk_chars = max(int(budget * len(text) / tokens * 0.95), 1)
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_chars,
+                chunk_overlap=int(chunk_chars * self.chunk_overlap),
+                length_function=len,
+                separators=SPLIT_SEPARATORS
+            )
+            chunks = splitter.split_text(text)
+        self.last_chunking_report = self._chunking_report(text, tokens, chunks)
+        return chunks
+
+    def _chunking_report(self, text: str, tokens: int, chunks: list[str]) -> dict:
+        overhead = self._count_tokens(_job_parsing_prompt(""))
+        fixed_chunks = self._fixed_splitter.split_text(text)
+        tokens_per_char = tokens / len(text)
+
+        def prompt_tokens(parts: list[str]) -> int:
+            return round(sum(len(part) for part in parts) * tokens_per_char) + overhead * len(parts)
+
+        report = {
+            "mode": "single" if len(chunks) == 1 else "map_reduce",
+            "context_window": self.model.context_window,
+            "chunk_token_budget": self.chunk_token_budget,
+            "calls": len(chunks),
+            "prompt_tokens": prompt_tokens(chunks),
+            "fixed_calls": len(fixed_chunks),
+            "fixed_prompt_tokens": prompt_tokens(fixed_chunks),
+        }
+        report["calls_saved"] = report["fixed_calls"] - report["calls"]
+        report["prompt_tokens_saved"] = report["fixed_prompt_tokens"] - report["prompt_tokens"]
+        logging.info(
+            "Chunked %s (%s tokens) as %s: %s calls, ~%s prompt tokens; saved %s calls and ~%s tokens",
+            self.job_link, tokens, report["mode"], report["calls"], report["prompt_tokens"],
+            report["calls_saved"], report["prompt_tokens_saved"]
+        )
+        tracing.annotate(
+            chunk_mode=report["mode"], calls_saved=report["calls_saved"],
+            prompt_tokens_saved=report["prompt_tokens_saved"]
+        )
+        return report
+
+    @tracing.traced("job.clean_page")
+    def _clean_page(self, page_source: str) -> str:
+        # Raw pages are far too big for the main log
+        log_artifact("raw_html", page_source, url=self.job_link)
+
+        # Keep only the posting: banners, "similar jobs" lists and footers
+        # would otherwise be chunked and each cost an LLM call
+        content = extract_main_content(page_source, self.job_link)
+        tracing.annotate(method=content.method, chars=len(content.text), html_chars=len(page_source))
+        logging.info(
+            "Extracted %d of %d page chars for %s via %s",
+            len(content.text), len(page_source), self.job_link, content.method
+        )
+        return content.text
+
+    def _has_job_content(self, text: str) -> bool:
+        if len(text) < self.min_content_chars:
+            return False
+        lowered = text.lower()
+        return sum(marker in lowered for marker in JOB_CONTENT_MARKERS) >= 2
+
+    @tracing.traced("job.fetch_static")
+    def _fetch_static(self) -> str | None:
+        import requests
 
-    def scrape_job(self) -> list[str]:
         try:
+            response = _get_http_session().get(self.job_link, timeout=self.http_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.info("HTTP fetch failed, falling back to browser: %s", e)
+            return None
+        if "html" not in response.headers.get("Content-Type", "html"):
+            return None
+        return response.text
+
+    @tracing.traced("job.fetch_browser")
+    def _fetch_with_browser(self) -> str:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self.driver_pool.acquire() as driver:
             # Navigate to page
-            self.driver.get(self.job_link)
+            driver.get(self.job_link)
             
             # Wait for page to load (adjust timeout as needed)
-            WebDriverWait(self.driver, 20).until(
+            WebDriverWait(driver, 20).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
-            # Optional: Add random delay to mimic human behavior
-            time.sleep(2 + (time.time() % 3))
+            if self.human_delay:
+                time.sleep(random.uniform(*self.human_delay))
             
             # Get page source
-            page_source = self.driver.page_source
-            
-            # Parse HTML 
-            soup = BeautifulSoup(page_source, 'html.parser')
-            logging.info(f"Raw soup {soup}")
-            # Remove script, style, and navigation elements
-            for script in soup(['script', 'style', 'nav', 'header', 'footer']):
-                script.decompose()
-            
-            # Extract clean text
-            text = soup.get_text(separator=' ', strip=True)
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            logging.info(f"Clean page text {text}")
-            # Split into chunks with 25% overlap
-            return self.text_splitter.split_text(text)
+            return driver.page_source
+
+    @tracing.traced("job.scrape")
+    def scrape_job(self) -> list[str]:
+        try:
+            text = ""
+            # Static pages don't need a browser, only client-rendered ones do
+            if self.http_first:
+                page_source = self._fetch_static()
+                if page_source:
+                    text = self._clean_page(page_source)
+                if not self._has_job_content(text):
+                    logging.info("No job content over plain HTTP for %s, using browser", self.job_link)
+                    text = ""
+
+            if not text:
+                text = self._clean_page(self._fetch_with_browser())
+            self.page_text = text
+            logging.debug("Clean page text for %s: %d chars", self.job_link, len(text))
+            log_artifact("clean_text", text, url=self.job_link)
+            # As few chunks as the model's context window allows
+            chunks = self.split_text(text)
+            tracing.annotate(chars=len(text), chunks=len(chunks))
+            return chunks
         except Exception as e:
-            logging.info(f"Error scraping job page: {e}")
+            logging.info("Error scraping job page: %s", e)
             return []
-        finally:
-            # Close driver
-            if self.driver:
-                self.driver.quit()
-                self.driver = None
 
+    @tracing.traced("job.semantic_filter")
     def _semantic_chunk_filter(self, chunks: list[str]) -> list[str]:
-        if not self.nlp:
+        if not chunks or not self.nlp:
             return chunks  # Return all chunks if spaCy not available
-        
-        # Define key semantic concepts for job description
-        key_concepts = [
-            "skills", "requirements", "responsibilities", 
-            "tasks", "qualifications", "job description"
-        ]
-        
-        key_docs = [self.nlp(concept) for concept in key_concepts]
-        
-        filtered_chunks = []
-        for chunk in chunks:
-            chunk_doc = self.nlp(chunk)
-            
-            # Calculate semantic similarity with key concepts
-            similarities = [chunk_doc.similarity(concept_doc) for concept_doc in key_docs]
-            
-            # If any similarity is high, keep the chunk
-            if max(similarities) > 0.5:
-                filtered_chunks.append(chunk)
-        
-        return filtered_chunks
 
-    def _job_parsing_prompt(self, chunk: str) -> str:
-        prompt = f"""
-        You are an expert job description parser. Extract details from this job description chunk:
+        import numpy as np
 
-        Chunk:
-        {chunk}
+        concepts = _concept_matrix(self.nlp)
+        docs = self.nlp.pipe(
+            chunks,
+            batch_size=self.semantic_batch_size,
+            disable=_unused_pipes(self.nlp)
+        )
+        chunk_vectors = _normalize_rows(np.vstack([doc.vector for doc in docs]))
 
-        IMPORTANT: If you find relevant information, update the JSON. 
-        If not in this chunk, leave fields as they are.
+        # Cosine similarity of every chunk against every key concept in one step
+        scores = (chunk_vectors @ concepts.T).max(axis=1)
 
-        Provide the output as JSON with these keys:
-        {{
-            "job_poster": "string (company name)",
-            "job_title": "string",
-            "required_skills": ["skill1", "skill2", ...],
-            "tasks": ["task1", "task2", ...]
-            "profile" : "string profile required for the job"
-        }}
+        if self.semantic_top_k:
+            keep = np.argsort(-scores, kind="stable")[:self.semantic_top_k]
+        else:
+            keep = np.flatnonzero(scores > self.semantic_threshold)
+        # The opening chunk usually carries the title and company name
+        keep = sorted(set(keep.tolist()) | {0})
+        logging.info("Semantic filter kept %s/%s chunks", len(keep), len(chunks))
+        tracing.annotate(chunks=len(chunks), kept=len(keep))
+        return [chunks[i] for i in keep]
 
-        If no new information is found, return the existing JSON or empty values.
-        """
-        return prompt
+    @tracing.traced("job.tag_skills")
+    def _tag_skills(self, job_chunks: list[str]) -> tuple[list[str], bool]:
+        """Skills named in the chunks, and whether the LLM can skip them."""
+        # Chunk overlaps only repeat mentions, which find() collapses
+        skills = self.taxonomy.find("\n".join(job_chunks))
+        enough = self.skill_fast_path is not None and len(skills) >= self.skill_fast_path
+        tracing.annotate(skills=len(skills), fast_path=enough)
+        logging.info("Tagged %s skills in %s%s", len(skills), self.job_link,
+                     ", skipping them in chunk prompts" if enough else "")
+        return skills, enough
+
+    def _job_parsing_prompt(self, chunk: str, with_skills: bool = True) -> str:
+        return _job_parsing_prompt(chunk, with_skills)
+
+    @tracing.traced("job.parse_chunk")
+    def _parse_chunk(self, chunk: str, with_skills: bool = True) -> dict:
+        # Create parsing prompt for this chunk
+        prompt = self._job_parsing_prompt(chunk, with_skills)
+
+        # Use model to parse job description chunk, stopping once the JSON closes
+        with model_task(TASK_EXTRACTION):
+            llm_response = self.model._run_json(prompt, self.on_field, format="json")
+        log_artifact("completion", llm_response, prompt_type="job_chunk")
+        return self.structured.parse(llm_response, "job_chunk")
+
+    async def _aparse_chunk(self, chunk: str, with_skills: bool = True) -> dict:
+        prompt = self._job_parsing_prompt(chunk, with_skills)
+        with model_task(TASK_EXTRACTION):
+            llm_response = await asyncio.wait_for(self.model._arun(prompt), timeout=self.chunk_timeout)
+        log_artifact("completion", llm_response, prompt_type="job_chunk")
+        return self.structured.parse(llm_response, "job_chunk")
+
+    def _merge_chunk_results(self, chunk_results: list, tagged_skills: list[str] | None = None) -> JobDescription:
+        # Initialize result dictionary
+        result = {
+            "job_poster": "",
+            "job_title": "",
+            "required_skills": [],
+            "tasks": [],
+            "profile": ""
+        }
+        # Ordered sets: first mention wins, later duplicates are O(1) to skip
+        skill_lists = [tagged_skills or []]
+        tasks: dict[str, str] = {}
 
-    def job_parser(self) -> JobDescription:
+        failed = 0
+        for chunk_result in chunk_results:
+            if isinstance(chunk_result, BaseException):
+                failed += 1
+                logging.info("Error parsing chunk response: %s", chunk_result)
+                continue
+            # Coerce stray strings/nulls into the JobDescription field types
+            chunk_result = normalize_job(chunk_result)
+
+            # Update result, avoiding duplicates
+            # Update job_poster and job_title if not already set
+            if not result["job_poster"] and chunk_result.get("job_poster"):
+                result["job_poster"] = chunk_result["job_poster"]
+            
+            if not result["job_title"] and chunk_result.get("job_title"):
+                result["job_title"] = chunk_result["job_title"]
+
+            if not result["profile"] and chunk_result.get("profile"):
+                result["profile"] = chunk_result["profile"]
+            
+            # Merge skills and tasks, avoiding duplicates
+            skill_lists.append(chunk_result.get("required_skills", []))
+            for task in chunk_result.get("tasks", []):
+                if task.strip():
+                    tasks.setdefault(" ".join(task.split()).casefold(), task.strip())
+
+        if failed == len(chunk_results):
+            raise ValueError(f"All {failed} job description chunks failed to parse")
+        if failed:
+            logging.warning("%s/%s job description chunks failed to parse", failed, len(chunk_results))
+
+        # Tagged skills first, then the LLM's, all under their canonical names
+        result["required_skills"] = merge_skills(*skill_lists, taxonomy=self.taxonomy)
+        result["tasks"] = list(tasks.values())
+        
+        # Create JobDescription object
+        return JobDescription(**result)
+
+    @tracing.traced("job.parse")
+    def job_parser(self, job_chunks: list[str] | None = None) -> JobDescription:
         try:
-            # Scrape job page
-            job_chunks = self.scrape_job()
+            # Scrape job page unless the caller already did; a fresh stored
+            # parse needs neither the page nor the LLM
+            if job_chunks is None:
+                stored = self._fresh_stored_job()
+                if stored is not None:
+                    return stored
+                job_chunks = self.scrape_job()
             
             if not job_chunks:
                 raise ValueError("No job description content found")
+
+            content_hash, stored = self._record_page()
+            if stored is not None:
+                return stored
+
+            # Drop chunks unrelated to the posting before they cost an LLM call
+            job_chunks = self._semantic_chunk_filter(job_chunks)
+            tagged_skills, skills_known = self._tag_skills(job_chunks)
             
-            # Initialize result dictionary
-            result = {
-                "job_poster": "",
-                "job_title": "",
-                "required_skills": [],
-                "tasks": []
-            }
+            # Dispatch chunk prompts concurrently, results come back in chunk order
+            chunk_results = bounded_map(
+                partial(self._parse_chunk, with_skills=not skills_known),
+                job_chunks,
+                max_workers=self.max_workers,
+                timeout=self.chunk_timeout
+            )
+            job_description = self._merge_chunk_results(chunk_results, tagged_skills)
+            if content_hash is not None:
+                self.store.put_job(self.job_link, content_hash, self.parser_version, job_description)
+            return job_description
+        
+        except Exception as e:
+            logging.info("Error parsing job description: %s", e)
+            return None
+
+    async def ajob_parser(self) -> JobDescription:
+        try:
+            stored = await asyncio.to_thread(self._fresh_stored_job)
+            if stored is not None:
+                return stored
+
+            # The browser is blocking, scrape on a worker thread
+            job_chunks = await asyncio.to_thread(self.scrape_job)
             
-            # Process each chunk
-            for chunk in job_chunks:
-                # Create parsing prompt for this chunk
-                prompt = self._job_parsing_prompt(chunk)
-                
-                # Use model to parse job description chunk
-                llm_response = self.model._run(prompt)
-                logging.info(f"llm response for job parsing chunk {chunk}")
-                # Extract JSON from response
-                try:
-                    # Find the first occurrence of '{' and the last occurrence of '}'
-                    start_idx = llm_response.find('{')
-                    end_idx = llm_response.rindex('}') + 1
-                    json_str = llm_response[start_idx:end_idx]
-                    
-                    # Parse JSON response
-                    chunk_result = json.loads(json_str)
-                    
-                    # Update result, avoiding duplicates
-                    # Update job_poster and job_title if not already set
-                    if not result["job_poster"] and chunk_result.get("job_poster"):
-                        result["job_poster"] = chunk_result["job_poster"]
-                    
-                    if not result["job_title"] and chunk_result.get("job_title"):
-                        result["job_title"] = chunk_result["job_title"]
-                    
-                    # Merge skills and tasks, avoiding duplicates
-                    result["required_skills"].extend(
-                        [skill for skill in chunk_result.get("required_skills", []) 
-                         if skill not in result["required_skills"]]
-                    )
-                    
-                    result["tasks"].extend(
-                        [task for task in chunk_result.get("tasks", []) 
-                         if task not in result["tasks"]]
-                    )
-                
-                except json.JSONDecodeError as e:
-                    logging.info(f"Error parsing chunk response as JSON: {e}")
-                    logging.info("Chunk response:", llm_response)
-                    continue
+            if not job_chunks:
+                raise ValueError("No job description content found")
+
+            content_hash, stored = await asyncio.to_thread(self._record_page)
+            if stored is not None:
+                return stored
+
+            job_chunks = await asyncio.to_thread(self._semantic_chunk_filter, job_chunks)
+            tagged_skills, skills_known = self._tag_skills(job_chunks)
             
-            # Create JobDescription object
-            return JobDescription(**result)
+            # The model enforces its own concurrency limit on _arun
+            chunk_results = await asyncio.gather(
+                *(self._aparse_chunk(chunk, not skills_known) for chunk in job_chunks),
+                return_exceptions=True
+            )
+            job_description = self._merge_chunk_results(chunk_results, tagged_skills)
+            if content_hash is not None:
+                await asyncio.to_thread(
+                    self.store.put_job, self.job_link, content_hash, self.parser_version, job_description
+                )
+            return job_description
         
         except Exception as e:
-            logging.info(f"Error parsing job description: {e}")
-            return None
\ No newline at end of file
+            logging.info("Error parsing job description: %s", e)
+            return None
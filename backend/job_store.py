@@ -0,0 +1,239 @@
+from backend.types import JobDescription
+from backend.resume_store import ResumeStore
+from typing import NamedTuple, Iterable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+
+
+# Query parameters that identify the visit, not the posting
+TRACKING_PARAMS = frozenset((
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid", "_hsenc", "_hsmi",
+    "ref", "refid", "ref_src", "referrer", "src", "source", "trk", "trkinfo", "trackingid",
+    "tracking_id", "lipi", "originalsubdomain", "gh_src", "lever-source", "lever-origin",
+))
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+_LINKEDIN_JOB_RE = re.compile(r"^/jobs/view/(?:[^/]*-)?(\d+)/?$")
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def normalize_job_url(url: str) -> str:
+    """Canonical form of a job link, so the same posting maps to one key.
+
+    Lowercases scheme and host, drops "www.", default ports, fragments,
+    trailing slashes and tracking parameters, and sorts what is left of the
+    query. LinkedIn links collapse to /jobs/view/<id>.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path or "/"
+
+    if host.endswith("linkedin.com"):
+        host = "linkedin.com"
+        match = _LINKEDIN_JOB_RE.match(path)
+        job_id = match.group(1) if match else dict(query).get("currentJobId")
+        if job_id:
+            return f"https://linkedin.com/jobs/view/{job_id}"
+
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def content_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class StoredJob(NamedTuple):
+    url: str
+    content_hash: str
+    text: str
+    job_description: JobDescription | None
+    # Parser version the job description was produced with
+    version: str | None
+    fetched_at: float
+    parsed_at: float | None
+
+
+class JobStore:
+    """Cleaned posting text and parsed JobDescriptions keyed by normalized URL.
+
+    Entries younger than ttl seconds are fresh and can be used without
+    fetching the page again. Past the ttl, the page is fetched again; if its
+    content hash is unchanged, the stored JobDescription is kept and the
+    LLM parse is skipped. Text and job descriptions are stored as
+    zlib-compressed blobs.
+    """
+
+    make_version = staticmethod(ResumeStore.make_version)
+
+    def __init__(self, path: str = os.path.join("cache", "jobs.sqlite3"),
+                 ttl: float | None = 3 * 24 * 3600):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                text BLOB NOT NULL,
+                job BLOB,
+                version TEXT,
+                fetched_at REAL NOT NULL,
+                parsed_at REAL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def is_fresh(self, entry: StoredJob) -> bool:
+        return self.ttl is None or time.time() - entry.fetched_at <= self.ttl
+
+    def _row_to_entry(self, row: tuple) -> StoredJob | None:
+        url, content_hash, text, job, version, fetched_at, parsed_at = row
+        job_description = None
+        try:
+            if job is not None:
+                job_description = JobDescription.model_validate_json(zlib.decompress(job))
+            text = zlib.decompress(text).decode("utf-8")
+        except Exception as e:
+            # A schema change can make old entries unreadable, treat as a miss
+            logging.warning("Dropping unreadable stored job %s: %s", url, e)
+            return None
+        return StoredJob(url, content_hash, text, job_description, version, fetched_at, parsed_at)
+
+    def get(self, url: str) -> StoredJob | None:
+        """Stored entry for url, fresh or not; see is_fresh()."""
+        return self.get_many([url]).get(normalize_job_url(url))
+
+    def get_many(self, urls: Iterable[str]) -> dict[str, StoredJob]:
+        """Stored entries for many links at once, keyed by normalized URL."""
+        keys = list(dict.fromkeys(normalize_job_url(url) for url in urls))
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                rows += self._conn.execute(
+                    "SELECT url, content_hash, text, job, version, fetched_at, parsed_at "
+                    f"FROM jobs WHERE url IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+        entries = {}
+        for row in rows:
+            entry = self._row_to_entry(row)
+            if entry is None:
+                self.invalidate(row[0])
+            else:
+                entries[entry.url] = entry
+        return entries
+
+    def plan(self, urls: Iterable[str], version: str) -> dict[str, list[str]]:
+        """Sort links by the work they need before a batch starts.
+
+        "ready": fresh and parsed with this version, no fetch or LLM call.
+        "refresh": stored but stale or parsed with another version; fetch
+        again, and parse only if the content changed.
+        "new": never seen.
+        """
+        urls = list(dict.fromkeys(urls))
+        entries = self.get_many(urls)
+        plan = {"ready": [], "refresh": [], "new": []}
+        for url in urls:
+            entry = entries.get(normalize_job_url(url))
+            if entry is None:
+                plan["new"].append(url)
+            elif self.is_fresh(entry) and entry.job_description is not None and entry.version == version:
+                plan["ready"].append(url)
+            else:
+                plan["refresh"].append(url)
+        return plan
+
+    def put_page(self, url: str, text: str) -> tuple[str, bool]:
+        """Record freshly fetched page text; returns (content hash, changed).
+
+        An unchanged page keeps its parsed job description and only has its
+        fetch time renewed. A changed page drops it.
+        """
+        key = normalize_job_url(url)
+        content_hash = content_sha256(text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM jobs WHERE url = ?", (key,)
+            ).fetchone()
+            changed = row is None or row[0] != content_hash
+            if changed:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs (url, content_hash, text, job, version, fetched_at, parsed_at) "
+                    "VALUES (?, ?, ?, NULL, NULL, ?, NULL)",
+                    (key, content_hash, zlib.compress(text.encode("utf-8"), 6), now)
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET fetched_at = ? WHERE url = ?", (now, key))
+            self._conn.commit()
+        return content_hash, changed
+
+    def put_job(self, url: str, content_hash: str, version: str, job_description: JobDescription) -> None:
+        """Attach a parsed job description to the page it was parsed from."""
+        data = zlib.compress(job_description.model_dump_json().encode("utf-8"), 9)
+        with self._lock:
+            # Only if the stored page is still the one that was parsed
+            self._conn.execute(
+                "UPDATE jobs SET job = ?, version = ?, parsed_at = ? WHERE url = ? AND content_hash = ?",
+                (data, version, time.time(), normalize_job_url(url), content_hash)
+            )
+            self._conn.commit()
+
+    def invalidate(self, url: str | None = None) -> int:
+        """Drop one posting, or everything when no url is given."""
+        with self._lock:
+            if url is None:
+                deleted = self._conn.execute("DELETE FROM jobs").rowcount
+            else:
+                deleted = self._conn.execute(
+                    "DELETE FROM jobs WHERE url = ?", (normalize_job_url(url),)
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def purge_expired(self, max_age: float | None = None) -> int:
+        """Drop postings not fetched for max_age seconds (default: 4x the ttl)."""
+        max_age = max_age if max_age is not None else (4 * self.ttl if self.ttl else None)
+        if max_age is None:
+            return 0
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE fetched_at < ?", (time.time() - max_age,)
+            ).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,114 @@
+from typing import Any
+import json
+import logging
+
+
+class IncrementalJSONParser:
+    """Parse a JSON object out of streamed LLM text as it arrives.
+
+    Text before the root '{' is ignored. feed() returns the (key, value) pairs
+    of top-level fields that completed in that piece of text, and `done` flips
+    once the root object closes so the caller can stop generation.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: dict[str, Any] = {}
+        self.done = False
+        self.end = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # key -> in_key -> colon -> value_wait -> value -> after_value -> key ...
+        self._state = "start"
+        self._key_start = 0
+        self._key = None
+        self._value_start = 0
+
+    def _complete(self, end: int, emitted: list) -> None:
+        raw = self.text[self._value_start:end].strip()
+        self._state = "after_value"
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logging.info("Skipping malformed streamed field %s: %s", self._key, e)
+            return
+        self.fields[self._key] = value
+        emitted.append((self._key, value))
+
+    def feed(self, piece: str) -> list[tuple[str, Any]]:
+        emitted = []
+        if self.done or not piece:
+            return emitted
+        self.text += piece
+        text = self.text
+
+        i = self._pos
+        while i < len(text):
+            c = text[i]
+            state = self._state
+
+            if state == "start":
+                if c == "{":
+                    self._depth = 1
+                    self._state = "key"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if state == "in_key":
+                            self._key = json.loads(text[self._key_start:i + 1])
+                            self._state = "colon"
+                        elif state == "value":
+                            self._complete(i + 1, emitted)
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1 and state == "key":
+                    self._key_start = i
+                    self._state = "in_key"
+                elif self._depth == 1 and state == "value_wait":
+                    self._value_start = i
+                    self._state = "value"
+            elif c in "{[":
+                if self._depth == 1 and state == "value_wait":
+                    self._value_start = i
+                    self._state = "value"
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and state == "value":
+                    self._complete(i + 1, emitted)
+                elif self._depth == 0:
+                    if state == "value":
+                        self._complete(i, emitted)
+                    self.done = True
+                    self.end = i + 1
+                    break
+            elif self._depth == 1:
+                if c == ":" and state == "colon":
+                    self._state = "value_wait"
+                elif c == ",":
+                    if state == "value":
+                        self._complete(i, emitted)
+                    self._state = "key"
+                elif state == "value_wait" and not c.isspace():
+                    # Bare scalar: number, true, false or null
+                    self._value_start = i
+                    self._state = "value"
+            i += 1
+
+        self._pos = i + 1 if self.done else i
+        return emitted
+
+    @property
+    def json_text(self) -> str:
+        """The root object text once closed, otherwise everything received."""
+        if self.done:
+            start = self.text.find("{")
+            return self.text[start:self.end]
+        return self.text
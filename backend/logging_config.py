@@ -0,0 +1,189 @@
+import atexit
+import gzip
+import hashlib
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_configured_file = None
+_listener = None
+_queue_handler = None
+_artifact_dir = None
+_lock = threading.Lock()
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Caps every formatted message at max_chars, noting how much was cut."""
+
+    def __init__(self, fmt: str = LOG_FORMAT, datefmt: str = DATE_FORMAT, max_chars: int = 2000):
+        super().__init__(fmt, datefmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = record.message
+        if self.max_chars and len(message) > self.max_chars:
+            record.message = (
+                f"{message[:self.max_chars]}... [truncated {len(message) - self.max_chars} chars]"
+            )
+        return super().formatMessage(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Thins out chatty call sites below WARNING.
+
+    Each call site (file and line) logs its first `keep_first` records, then
+    one in every `every`. Warnings, errors and artifacts always pass.
+    """
+
+    def __init__(self, keep_first: int = 100, every: int = 10):
+        super().__init__()
+        self.keep_first = keep_first
+        self.every = every
+        self._seen: dict[tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every <= 1 or hasattr(record, "artifact"):
+            return True
+        site = (record.pathname, record.lineno)
+        # A lost increment under contention only shifts which record is sampled
+        seen = self._seen.get(site, 0) + 1
+        self._seen[site] = seen
+        return seen <= self.keep_first or seen % self.every == 0
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    Message arguments are merged on the listener thread, so callers pay
+    only for creating the record. When the queue is full, records are
+    dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks pin frames, render them while they are still live
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _NoArtifacts(logging.Filter):
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not hasattr(record, "artifact")
+
+
+class ArtifactHandler(logging.Handler):
+    """Writes artifact records to gzip side files, off the main log."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        path = getattr(record, "artifact_path", None)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(record.artifact)
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging(log_dir: str = "logs", name: str = "resume_tailor",
+                      level: int = logging.INFO, max_message_chars: int = 2000,
+                      queue_size: int = 10000, sample_after: int = 100, sample_every: int = 10,
+                      artifacts: bool = False) -> str:
+    """Send backend logs to a timestamped file under log_dir.
+
+    Importing backend modules no longer touches logging; the application
+    entry point calls this once. Later calls return the existing log file.
+    Records go through a bounded queue to a background thread that formats
+    and writes them, messages longer than max_message_chars are truncated
+    and chatty call sites are sampled (see SamplingFilter). With artifacts
+    on, payloads passed to log_artifact are kept as gzip files under
+    log_dir/artifacts.
+    """
+    global _configured_file, _listener, _queue_handler, _artifact_dir
+    with _lock:
+        if _configured_file is not None:
+            return _configured_file
+
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_filename = os.path.join(log_dir, f"log_{name}_{current_time}.log")
+
+        file_handler = logging.FileHandler(log_filename, mode='w', encoding="utf-8")
+        file_handler.setFormatter(TruncatingFormatter(max_chars=max_message_chars))
+        file_handler.addFilter(_NoArtifacts())
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = BackgroundQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(sample_after, sample_every))
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, ArtifactHandler(), respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+        _queue_handler = queue_handler
+
+        if artifacts:
+            _artifact_dir = os.path.join(log_dir, "artifacts")
+        _configured_file = log_filename
+        return log_filename
+
+
+def shutdown_logging() -> None:
+    """Flush queued records to disk and stop the background writer."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_records() -> int:
+    """Records discarded because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def log_artifact(kind: str, payload: str, **context) -> str | None:
+    """Keep a large payload (raw HTML, raw completions) in a gzip side file.
+
+    Returns the file path, or None when artifacts are off. The main log only
+    gets a one-line pointer; the write itself happens on the logging thread.
+    """
+    logger = logging.getLogger("resume_tailor.artifacts")
+    if _artifact_dir is None or not payload or not logger.isEnabledFor(logging.INFO):
+        return None
+    digest = hashlib.sha1(payload.encode("utf-8", "replace")).hexdigest()[:12]
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(_artifact_dir, kind, f"{stamp}-{digest}.txt.gz")
+    logger.info("%s artifact", kind, extra={"artifact": payload, "artifact_path": path})
+    logger.info(
+        "Saved %s artifact (%d chars%s) to %s", kind, len(payload),
+        "".join(f", {key}={value}" for key, value in context.items()), path
+    )
+    return path
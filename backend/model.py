@@ -1,31 +1,686 @@
 from abc import ABC,abstractmethod
-from langchain_community.llms.ollama import Ollama
-from langchain_openai import ChatOpenAI
+from backend.concurrency import bounded_map
+from backend.json_stream import IncrementalJSONParser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Iterable, Any
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+import weakref
+import logging
+
+
+# Status codes a backend returns when it is overloaded rather than broken
+OVERLOAD_STATUS_CODES = (429, 503)
+
+# Ollama's num_ctx when none is set
+OLLAMA_DEFAULT_CONTEXT = 2048
+
+# Context windows in tokens by model name prefix, most specific first
+OPENAI_CONTEXT_WINDOWS = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5-turbo", 16_385),
+    ("o1", 200_000),
+    ("o3", 200_000),
+)
+
+# Task types a RoutedModel maps to model tiers
+TASK_EXTRACTION = "extraction"
+TASK_ANALYSIS = "analysis"
+TASK_GENERATION = "generation"
+
+_clients: dict = {}
+_async_clients: dict = {}
+_clients_lock = threading.Lock()
+
+
+def _pool_limits():
+    import httpx
+    return httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+
+def _shared_client(host: str):
+    # One keep-alive connection pool per Ollama host, shared by every OssModel
+    import ollama
+    with _clients_lock:
+        if host not in _clients:
+            _clients[host] = ollama.Client(host=host, limits=_pool_limits())
+        return _clients[host]
+
+
+def _shared_async_client(host: str):
+    # httpx async pools are bound to the event loop that created them
+    import ollama
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        per_loop = _async_clients.setdefault(host, weakref.WeakKeyDictionary())
+        if loop not in per_loop:
+            per_loop[loop] = ollama.AsyncClient(host=host, limits=_pool_limits())
+        return per_loop[loop]
+
+
+def _is_overloaded(error: Exception) -> bool:
+    import ollama
+    import httpx
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code in OVERLOAD_STATUS_CODES
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in OVERLOAD_STATUS_CODES
+    return isinstance(error, (httpx.ConnectError, httpx.ReadTimeout, httpx.PoolTimeout))
+
+
+def _backoff_delay(attempt: int, base: float) -> float:
+    return base * (2 ** attempt) * (0.5 + random.random())
+
+
+def _count_retry() -> None:
+    # Imported here because backend.tracing builds on this module
+    from backend import tracing
+    tracing.add("retries")
+
+
+_current_task: ContextVar[str | None] = ContextVar("resume_tailor_model_task", default=None)
+
+
+@contextmanager
+def model_task(task: str) -> Iterator[None]:
+    """Tag the model calls made in this block with a task type.
+
+    Only RoutedModel looks at the tag. Like trace spans it follows the
+    context into bounded_map workers and asyncio.to_thread.
+    """
+    token = _current_task.set(task)
+    try:
+        yield
+    finally:
+        _current_task.reset(token)
+
+
+def current_model_task() -> str | None:
+    return _current_task.get()
+
 
 class Model(ABC):
-    
+
+    model_name: str = ""
+    params: dict = {}
+    max_concurrency: int = 4
+    # Prompt plus completion tokens the backend accepts in one call
+    context_window: int = 8192
+
     #Model call abstraction
     @abstractmethod
     def _run(self):
         pass
 
+    async def _arun(self,input) -> str:
+        return await asyncio.to_thread(self._run, input)
+
+    def _warm(self) -> None:
+        # Load the model ahead of its first call; nothing to do for hosted backends
+        pass
+
+    def _run_batch(self,inputs:list,max_concurrency:int|None=None,timeout:float|None=None) -> list:
+        # Responses in input order; a failed call leaves its exception in place
+        return bounded_map(
+            self._run,
+            inputs,
+            max_workers=max_concurrency or self.max_concurrency,
+            timeout=timeout
+        )
+
+    def _stream(self,input,format:str|None=None) -> Iterator[str]:
+        # Backends without streaming hand back the whole completion at once;
+        # format="json" asks backends that support it for JSON-only output
+        yield self._run(input)
+
+    def _run_json(self,input,on_field:Callable[[str,Any],None]|None=None,format:str|None=None) -> str:
+        """Stream a completion expected to hold one JSON object.
+
+        on_field is called with each top-level field as soon as it closes, and
+        generation is cut off once the root object is complete.
+        """
+        parser = IncrementalJSONParser()
+        stream = self._stream(input, format=format)
+        try:
+            for piece in stream:
+                for key, value in parser.feed(piece):
+                    if on_field:
+                        on_field(key, value)
+                if parser.done:
+                    break
+        finally:
+            # Closing the stream drops the connection, which stops generation
+            stream.close()
+        return parser.json_text
+
 
 
 class OssModel(Model):
 
-    def __init__(self,model="llama3"):
-        self.model = Ollama(model=model,verbose=False) 
-    
+    def __init__(self,model="llama3",host:str|None=None,max_concurrency:int=4,
+                 max_retries:int=3,backoff:float=0.5,context_window:int|None=None,**options):
+        self.model_name = model
+        if context_window:
+            # Ollama silently drops the start of prompts longer than num_ctx
+            options["num_ctx"] = context_window
+        self.params = options
+        self.context_window = options.get("num_ctx", OLLAMA_DEFAULT_CONTEXT)
+        self.host = host or os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.model = _shared_client(self.host)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = weakref.WeakKeyDictionary()
+
+    def _generate_kwargs(self, input, format:str|None=None) -> dict:
+        kwargs = {"model": self.model_name, "prompt": str(input), "options": self.params or None}
+        if format:
+            kwargs["format"] = format
+        return kwargs
+
+    def _warm(self) -> None:
+        # An empty prompt loads the model and renews its keep-alive without generating
+        self.model.generate(model=self.model_name, prompt="", options=self.params or None)
 
     def _run(self,input) -> str :
-        return self.model.invoke(input)
+        attempt = 0
+        while True:
+            try:
+                with self._slots:
+                    return self.model.generate(**self._generate_kwargs(input))["response"]
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_overloaded(e):
+                    raise
+                delay = _backoff_delay(attempt, self.backoff)
+                logging.warning("%s overloaded (%s), retrying in %.2fs", self.model_name, e, delay)
+                _count_retry()
+                time.sleep(delay)
+                attempt += 1
+
+    def _stream(self,input,format:str|None=None) -> Iterator[str]:
+        attempt = 0
+        started = False
+        while True:
+            try:
+                with self._slots:
+                    for chunk in self.model.generate(stream=True, **self._generate_kwargs(input, format)):
+                        started = True
+                        yield chunk["response"]
+                    return
+            except Exception as e:
+                # Only retry before any text has been handed out
+                if started or attempt >= self.max_retries or not _is_overloaded(e):
+                    raise
+                delay = _backoff_delay(attempt, self.backoff)
+                logging.warning("%s overloaded (%s), retrying in %.2fs", self.model_name, e, delay)
+                _count_retry()
+                time.sleep(delay)
+                attempt += 1
+
+    async def _arun(self,input) -> str:
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_slots:
+            self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        slots = self._async_slots[loop]
+        client = _shared_async_client(self.host)
+
+        attempt = 0
+        while True:
+            try:
+                async with slots:
+                    response = await client.generate(**self._generate_kwargs(input))
+                    return response["response"]
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_overloaded(e):
+                    raise
+                delay = _backoff_delay(attempt, self.backoff)
+                logging.warning("%s overloaded (%s), retrying in %.2fs", self.model_name, e, delay)
+                _count_retry()
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+_openai_http_client = None
+_openai_lock = threading.Lock()
+
+
+def _shared_openai_http_client():
+    import httpx
+    global _openai_http_client
+    with _openai_lock:
+        if _openai_http_client is None:
+            _openai_http_client = httpx.Client(limits=_pool_limits())
+        return _openai_http_client
 
 
 class Openai(Model):
 
-    def __init__(self,model="gpt-4o"):
-        self.model = ChatOpenAI(model)
+    def __init__(self,model="gpt-4o",max_concurrency:int=4,max_retries:int=3,context_window:int|None=None):
+        self.model_name = model
+        self.params = {}
+        self.max_concurrency = max_concurrency
+        self.context_window = context_window or next(
+            (window for prefix, window in OPENAI_CONTEXT_WINDOWS if model.startswith(prefix)), 128_000
+        )
+        from langchain_openai import ChatOpenAI
+        # ChatOpenAI retries 429/5xx responses itself with exponential backoff
+        self.model = ChatOpenAI(
+            model=model,
+            max_retries=max_retries,
+            http_client=_shared_openai_http_client()
+        )
 
     def _run(self,input) -> str:
         response = self.model.invoke(input)
-        return response["content"]
\ No newline at end of file
+        return response.content
+
+    def _stream(self,input,format:str|None=None) -> Iterator[str]:
+        model = self.model
+        if format == "json":
+            model = model.bind(response_format={"type": "json_object"})
+        for chunk in model.stream(input):
+            yield chunk.content
+
+    async def _arun(self,input) -> str:
+        response = await self.model.ainvoke(input)
+        return response.content
+
+    def _run_batch(self,inputs:list,max_concurrency:int|None=None,timeout:float|None=None) -> list:
+        if timeout is not None:
+            return super()._run_batch(inputs, max_concurrency=max_concurrency, timeout=timeout)
+        responses = self.model.batch(
+            inputs,
+            config={"max_concurrency": max_concurrency or self.max_concurrency},
+            return_exceptions=True
+        )
+        return [r if isinstance(r, Exception) else r.content for r in responses]
+
+
+class BackendStats:
+    """Rolling latency and error rate of one backend over its last calls.
+
+    Latency is the time until the backend starts answering: the whole call
+    for _run and _arun, the first piece for _stream.
+    """
+
+    def __init__(self, window: int = 50):
+        self._latencies = deque(maxlen=window)
+        self._errors = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.last_failure_at = 0.0
+
+    def record(self, seconds: float | None, error: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self._errors.append(error)
+            if error:
+                self.failures += 1
+                self.last_failure_at = time.monotonic()
+            elif seconds is not None:
+                self._latencies.append(seconds)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "p50_s": self.percentile(0.5),
+            "p95_s": self.percentile(0.95),
+        }
+
+
+class RoutedModel(Model):
+    """Sends each call to the model tier configured for its task type.
+
+    tiers maps a task type (see model_task) to one backend or a list of
+    interchangeable backends; calls without a task, or with a task that has
+    no tier, go to default_tier (the first tier if not given). Within a
+    tier, backends with few samples are tried first in the given order,
+    then by rolling median latency. A backend whose error rate reaches
+    max_error_rate sits out cooldown seconds after its last failure, unless
+    nothing else is left.
+
+    A failed call fails over to the next backend; a streamed call only
+    before its first piece. _run and _arun also hedge: if the backend has
+    not answered after hedge_after seconds (by default its rolling
+    hedge_percentile latency once it has min_samples), the same prompt goes
+    to the next backend as well and the first answer wins. A backend that
+    stalls on more than 1 - hedge_percentile of its calls needs a lower
+    percentile or a fixed hedge_after. Only the winner of a race records its
+    latency, so hedged-away stalls don't raise the hedge trigger. A losing
+    sync call cannot be interrupted and runs to completion on a worker thread.
+    """
+
+    def __init__(self, tiers: dict[str, Model | list[Model]], default_tier: str | None = None,
+                 hedge: bool = True, hedge_after: float | None = None, hedge_percentile: float = 0.95,
+                 min_samples: int = 5,
+                 max_error_rate: float = 0.5, cooldown: float = 30.0, window: int = 50):
+        if not tiers or not all(tiers.values()):
+            raise ValueError("RoutedModel needs at least one tier, and a backend in every tier")
+        self.tiers = {task: list(backends) if isinstance(backends, (list, tuple)) else [backends]
+                      for task, backends in tiers.items()}
+        self.default_tier = default_tier or next(iter(self.tiers))
+        if self.default_tier not in self.tiers:
+            raise ValueError(f"Unknown default tier {self.default_tier!r}")
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+
+        # A model may sit in several tiers, its stats are shared
+        self.backends: list[Model] = list({id(m): m for ms in self.tiers.values() for m in ms}.values())
+        self.stats = {id(m): BackendStats(window) for m in self.backends}
+        self.model_name = "+".join(dict.fromkeys(m.model_name for m in self.backends))
+        self.params = {}
+        self.max_concurrency = max(m.max_concurrency for m in self.backends)
+        # Chunk and prompt budgets have to fit whichever backend gets the call
+        self.context_window = min(m.context_window for m in self.backends)
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * sum(m.max_concurrency for m in self.backends),
+            thread_name_prefix="routed-model"
+        )
+
+    def _candidates(self) -> list[Model]:
+        task = current_model_task()
+        backends = self.tiers.get(task) or self.tiers[self.default_tier]
+        now = time.monotonic()
+
+        def cooling(model: Model) -> bool:
+            stats = self.stats[id(model)]
+            return (stats.error_rate >= self.max_error_rate
+                    and now - stats.last_failure_at < self.cooldown)
+
+        def rank(item: tuple[int, Model]) -> tuple:
+            position, model = item
+            stats = self.stats[id(model)]
+            if stats.samples < self.min_samples:
+                return (0, 0.0, position)
+            return (1, stats.percentile(0.5), position)
+
+        ordered = [model for _, model in sorted(enumerate(backends), key=rank)]
+        return [m for m in ordered if not cooling(m)] + [m for m in ordered if cooling(m)]
+
+    def _hedge_delay(self, model: Model) -> float | None:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        stats = self.stats[id(model)]
+        return stats.percentile(self.hedge_percentile) if stats.samples >= self.min_samples else None
+
+    def _timed(self, model: Model, fn: Callable[[Model], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = fn(model)
+        except Exception:
+            self.stats[id(model)].record(None, error=True)
+            raise
+        self.stats[id(model)].record(time.perf_counter() - start)
+        return result
+
+    def _censor(self, losers: Iterable[tuple[Model, float]]) -> None:
+        # A call that lost the race only shows its latency is above the
+        # winner's; recording its stall would push up the percentile that
+        # triggers the next hedge
+        for model, _ in losers:
+            self.stats[id(model)].record(None)
+
+    @staticmethod
+    def _note(task: str, model: Model, counter: str | None = None) -> None:
+        from backend import tracing
+        tracing.annotate(task=task, backend=model.model_name)
+        if counter:
+            tracing.add(counter)
+
+    def _run(self, input) -> str:
+        task = current_model_task() or self.default_tier
+        candidates = self._candidates()
+        if len(candidates) == 1 or self._hedge_delay(candidates[0]) is None:
+            # No hedge would be sent, skip the hop to a worker thread
+            return self._run_failover(task, candidates, input)
+
+        waiting = list(candidates)
+        running: dict = {}
+        last_error = None
+
+        def launch(counter: str | None = None) -> None:
+            model = waiting.pop(0)
+            if counter == "hedges":
+                logging.info("Slow %s call, hedging with %s", task, model.model_name)
+            self._note(task, model, counter)
+            future = self._executor.submit(contextvars.copy_context().run, model._run, input)
+            running[future] = (model, time.perf_counter())
+
+        launch()
+        try:
+            while running:
+                delay = self._hedge_delay(next(reversed(running.values()))[0]) if waiting else None
+                done, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+                if not done:
+                    # The newest call is slower than usual, race the next backend
+                    launch("hedges")
+                    continue
+                for future in done:
+                    model, start = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.stats[id(model)].record(time.perf_counter() - start)
+                        self._note(task, model)
+                        return future.result()
+                    self.stats[id(model)].record(None, error=True)
+                    last_error = error
+                    logging.warning("%s failed on %s: %s", model.model_name, task, error)
+                if not running and waiting:
+                    launch("failovers")
+            raise last_error
+        finally:
+            self._censor(running.values())
+
+    def _run_failover(self, task: str, candidates: list[Model], input) -> str:
+        last_error = None
+        for i, model in enumerate(candidates):
+            self._note(task, model, "failovers" if i else None)
+            try:
+                return self._timed(model, lambda m: m._run(input))
+            except Exception as e:
+                last_error = e
+                logging.warning("%s failed on %s: %s", model.model_name, task, e)
+        raise last_error
+
+    def _stream(self, input, format: str | None = None) -> Iterator[str]:
+        # Resolved now, a generator body would only run on the first next()
+        return self._stream_failover(current_model_task() or self.default_tier, self._candidates(), input, format)
+
+    def _stream_failover(self, task: str, candidates: list[Model], input, format: str | None) -> Iterator[str]:
+        last_error = None
+        for i, model in enumerate(candidates):
+            self._note(task, model, "failovers" if i else None)
+            stats = self.stats[id(model)]
+            start = time.perf_counter()
+            started = False
+            stream = model._stream(input, format=format)
+            try:
+                for piece in stream:
+                    if not started:
+                        started = True
+                        stats.record(time.perf_counter() - start)
+                    yield piece
+                if not started:
+                    stats.record(time.perf_counter() - start)
+                return
+            except Exception as e:
+                stats.record(None, error=True)
+                # Text already handed out can't be taken back
+                if started:
+                    raise
+                last_error = e
+                logging.warning("%s failed on %s: %s", model.model_name, task, e)
+            finally:
+                stream.close()
+        raise last_error
+
+    def _run_json(self, input, on_field: Callable[[str, Any], None] | None = None,
+                  format: str | None = None) -> str:
+        # Handed to the backend's own _run_json, so a CachedModel in a tier
+        # sees the whole call and can store it; fails over like _stream
+        task = current_model_task() or self.default_tier
+        last_error = None
+        for i, model in enumerate(self._candidates()):
+            self._note(task, model, "failovers" if i else None)
+            stats = self.stats[id(model)]
+            start = time.perf_counter()
+            started = False
+            consumer_failed = False
+
+            def relay(key: str, value: Any) -> None:
+                nonlocal started, consumer_failed
+                if not started:
+                    started = True
+                    stats.record(time.perf_counter() - start)
+                if on_field:
+                    try:
+                        on_field(key, value)
+                    except BaseException:
+                        consumer_failed = True
+                        raise
+
+            try:
+                text = model._run_json(input, relay, format=format)
+            except Exception as e:
+                if consumer_failed:
+                    raise
+                stats.record(None, error=True)
+                # Fields already handed out can't be taken back
+                if started:
+                    raise
+                last_error = e
+                logging.warning("%s failed on %s: %s", model.model_name, task, e)
+                continue
+            if not started:
+                stats.record(time.perf_counter() - start)
+            return text
+        raise last_error
+
+    async def _arun(self, input) -> str:
+        task = current_model_task() or self.default_tier
+        waiting = self._candidates()
+        running: dict = {}
+        last_error = None
+
+        def launch(counter: str | None = None) -> None:
+            model = waiting.pop(0)
+            if counter == "hedges":
+                logging.info("Slow %s call, hedging with %s", task, model.model_name)
+            self._note(task, model, counter)
+            running[asyncio.ensure_future(model._arun(input))] = (model, time.perf_counter())
+
+        launch()
+        try:
+            while running:
+                delay = self._hedge_delay(next(reversed(running.values()))[0]) if waiting else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch("hedges")
+                    continue
+                for task_future in done:
+                    model, start = running.pop(task_future)
+                    error = task_future.exception()
+                    if error is None:
+                        self.stats[id(model)].record(time.perf_counter() - start)
+                        self._note(task, model)
+                        return task_future.result()
+                    self.stats[id(model)].record(None, error=True)
+                    last_error = error
+                    logging.warning("%s failed on %s: %s", model.model_name, task, error)
+                if not running and waiting:
+                    launch("failovers")
+            raise last_error
+        finally:
+            self._censor(running.values())
+            # Unlike threads, losing coroutines can be cancelled
+            for task_future in running:
+                task_future.cancel()
+
+    def _warm(self) -> None:
+        bounded_map(lambda m: m._warm(), self.backends, max_workers=len(self.backends))
+
+    def backend_stats(self) -> dict[str, dict]:
+        return {model.model_name: self.stats[id(model)].snapshot() for model in self.backends}
+
+
+class ModelWarmer:
+    """Preloads local models at startup and keeps them loaded.
+
+    Ollama unloads a model after five idle minutes by default, and the next
+    call pays the load again. start() warms every model in parallel, then a
+    daemon thread warms them again every interval seconds.
+    """
+
+    def __init__(self, models: Iterable[Model], interval: float = 240.0):
+        self.models = list(models)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def warm(self) -> dict[str, float | Exception]:
+        """Seconds each model took to warm, or the exception it raised."""
+        def timed(model: Model) -> float:
+            start = time.perf_counter()
+            model._warm()
+            return time.perf_counter() - start
+
+        results = bounded_map(timed, self.models, max_workers=max(1, len(self.models)))
+        for model, result in zip(self.models, results):
+            if isinstance(result, Exception):
+                logging.warning("Warm-up of %s failed: %s", model.model_name, result)
+        return {model.model_name: result for model, result in zip(self.models, results)}
+
+    def start(self) -> dict[str, float | Exception]:
+        results = self.warm()
+        logging.info("Warmed models: %s", results)
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._keep_alive, name="model-warmer", daemon=True)
+            self._thread.start()
+        return results
+
+    def _keep_alive(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.warm()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,153 @@
+from backend.types import Resume, JobDescription
+from backend.ats_score import normalize_tokens, STOPWORDS
+from backend.tokens import count_tokens
+from typing import NamedTuple
+import json
+import logging
+
+
+# Floor for budgets derived from small context windows
+MIN_PROMPT_TOKENS = 512
+
+
+class CompiledPrompt(NamedTuple):
+    text: str
+    tokens: int
+    # Entries dropped to stay within budget, by resume section
+    trimmed: dict[str, list[str]]
+
+
+class PromptCompiler:
+    """Build resume/job prompts that fit a token budget.
+
+    The static instructions come first so backends can reuse a cached
+    prefix across jobs. Personal details, skills, languages and the job
+    description are always included; experience, projects, education and
+    hobbies are ranked by keyword overlap with the job and kept, most
+    relevant first, while they fit in token_budget.
+    """
+
+    # Tie-breaker between equally relevant entries, lower goes first
+    SECTION_PRIORITY = {"experience": 0, "projects": 1, "education": 2, "hobbies": 3}
+
+    def __init__(self, token_budget: int = 6000, model_name: str | None = None):
+        self.token_budget = token_budget
+        self.model_name = model_name
+
+    @classmethod
+    def for_model(cls, model, completion_tokens: int = 1024,
+                  token_budget: int | None = None) -> "PromptCompiler":
+        """Compiler whose prompts leave completion_tokens of the model's context window free.
+
+        Backends like Ollama silently drop the start of a prompt that does
+        not fit, which is where the static instructions are. token_budget
+        can only lower the derived budget.
+        """
+        budget = model.context_window - completion_tokens
+        if token_budget:
+            budget = min(budget, token_budget)
+        return cls(max(budget, MIN_PROMPT_TOKENS), model.model_name)
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model_name)
+
+    @staticmethod
+    def _job_terms(job: JobDescription) -> set[str]:
+        text = " ".join(
+            [job.job_title or "", job.profile or ""]
+            + (job.required_skills or []) + (job.tasks or [])
+        )
+        return {token for token in normalize_tokens(text) if token not in STOPWORDS}
+
+    @staticmethod
+    def _relevance(text: str, job_terms: set[str]) -> float:
+        tokens = set(normalize_tokens(text))
+        if not tokens:
+            return 0.0
+        hits = len(tokens & job_terms)
+        # Favour entries dense in job keywords, not merely long ones
+        return hits + hits / len(tokens)
+
+    def _job_block(self, job: JobDescription) -> str:
+        return "\n".join([
+            "Job Description:",
+            f"- Job Title: {job.job_title or 'Not specified'}",
+            f"- Company: {job.job_poster or 'Not specified'}",
+            f"- Required Skills: {', '.join(job.required_skills or [])}",
+            f"- Job Profile: {job.profile or 'Not specified'}",
+            f"- Key Tasks: {'; '.join(job.tasks or [])}",
+        ])
+
+    def _candidates(self, resume: Resume) -> list[tuple[str, int, str]]:
+        candidates = []
+        for i, entry in enumerate(resume.experience or []):
+            candidates.append(("experience", i, json.dumps(entry, ensure_ascii=False)))
+        for i, (name, description) in enumerate((resume.projects or {}).items()):
+            candidates.append(("projects", i, json.dumps({name: description}, ensure_ascii=False)))
+        for i, entry in enumerate(resume.education or []):
+            candidates.append(("education", i, json.dumps(entry, ensure_ascii=False)))
+        for i, hobby in enumerate(resume.hobbies or []):
+            candidates.append(("hobbies", i, hobby))
+        return candidates
+
+    def compile(self, instructions: str, resume: Resume, job: JobDescription) -> CompiledPrompt:
+        job_terms = self._job_terms(job)
+
+        # Matching skills first, all of them kept: the model may not invent new ones
+        skills = sorted(
+            resume.skills or [],
+            key=lambda skill: -self._relevance(skill, job_terms)
+        )
+        header = "\n".join([
+            "Base Resume:",
+            f"- full_name: {resume.full_name or 'Not specified'}",
+            f"- location: {resume.location or 'Not specified'}",
+            f"- phone_number: {resume.phone_number or 'Not specified'}",
+            f"- socials: {json.dumps(resume.socials or {}, ensure_ascii=False)}",
+            f"- profile: {resume.profile or 'Not specified'}",
+            f"- skills: {', '.join(skills)}",
+            f"- languages: {', '.join(resume.languages or [])}",
+        ])
+        job_block = self._job_block(job)
+        fixed = "\n\n".join([instructions.strip(), header, job_block])
+        remaining = self.token_budget - self._count(fixed)
+        if remaining < 0:
+            logging.warning(
+                "Fixed prompt sections alone exceed the %s token budget", self.token_budget
+            )
+
+        candidates = self._candidates(resume)
+        ranked = sorted(
+            candidates,
+            key=lambda c: (-self._relevance(c[2], job_terms), self.SECTION_PRIORITY[c[0]], c[1])
+        )
+        kept: set[tuple[str, int]] = set()
+        trimmed: dict[str, list[str]] = {}
+        for section, index, text in ranked:
+            # Each entry becomes one "  - ..." line
+            cost = self._count(text) + 2
+            if cost <= remaining:
+                kept.add((section, index))
+                remaining -= cost
+            else:
+                trimmed.setdefault(section, []).append(text)
+
+        # Kept entries stay in their original order inside each section
+        sections = []
+        for section in self.SECTION_PRIORITY:
+            lines = [
+                f"  - {text}" for s, i, text in candidates
+                if s == section and (s, i) in kept
+            ]
+            if lines:
+                sections.append(f"- {section}:\n" + "\n".join(lines))
+
+        resume_block = header + ("\n" + "\n".join(sections) if sections else "")
+        text = "\n\n".join([instructions.strip(), resume_block, job_block])
+        tokens = self._count(text)
+        if trimmed:
+            logging.info(
+                "Prompt compacted to %s tokens, trimmed %s", tokens,
+                ", ".join(f"{len(v)} {k}" for k, v in trimmed.items())
+            )
+        return CompiledPrompt(text, tokens, trimmed)
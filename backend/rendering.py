@@ -0,0 +1,377 @@
+from backend.types import Resume
+from backend import tracing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple, Iterable
+from xml.sax.saxutils import escape
+import io
+import os
+import re
+import unicodedata
+import zipfile
+import logging
+
+
+RENDER_FORMATS = ("pdf", "docx")
+
+SECTION_TITLES = {
+    "profile": "Profile",
+    "skills": "Skills",
+    "experience": "Experience",
+    "projects": "Projects",
+    "education": "Education",
+    "languages": "Languages",
+    "hobbies": "Interests",
+}
+
+# Millimetres per PDF point
+_MM_PER_PT = 25.4 / 72
+
+# Core PDF fonts only cover Latin-1; typographic punctuation and letters
+# that do not decompose fold to their closest ASCII
+_LATIN1_FOLDS = str.maketrans({
+    "\u2013": "-", "\u2014": "-", "\u2212": "-", "\u2018": "'", "\u2019": "'",
+    "\u201c": '"', "\u201d": '"', "\u2022": "-", "\u2026": "...", "\u00a0": " ",
+    "\u0141": "L", "\u0142": "l", "\u0110": "D", "\u0111": "d", "\u0131": "i",
+    "\u0152": "OE", "\u0153": "oe",
+})
+
+# Characters XML 1.0 does not allow, which LLM output occasionally carries
+_XML_INVALID_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class ResumeTemplate(NamedTuple):
+    """Layout shared by the PDF and DOCX renderers.
+
+    Templates are hashable, so each process compiles a given template once
+    (see get_renderer). Sizes are in points, margins in millimetres. With
+    font_path set, PDFs embed that TrueType font and keep all of Unicode;
+    otherwise the core font is used and text is folded to Latin-1. DOCX
+    output takes its styles and page setup from docx_path, or from the
+    python-docx default template.
+    """
+
+    font: str = "Helvetica"
+    font_path: str | None = None
+    bold_font_path: str | None = None
+    name_size: float = 18
+    heading_size: float = 12
+    body_size: float = 10
+    line_spacing: float = 1.3
+    margin: float = 18
+    sections: tuple[str, ...] = ("profile", "skills", "experience", "projects", "education", "languages", "hobbies")
+    docx_path: str | None = None
+
+
+class Block(NamedTuple):
+    # name, contact, heading, paragraph or bullet
+    kind: str
+    text: str
+
+
+def resume_blocks(resume: Resume, sections: Iterable[str] = ResumeTemplate().sections) -> list[Block]:
+    """Resume content in reading order, independent of the output format."""
+    blocks = [Block("name", resume.full_name or "")]
+    contact = [resume.location, str(resume.phone_number) if resume.phone_number else None]
+    contact += [f"{platform}: {url}" for platform, url in (resume.socials or {}).items()]
+    contact_line = " | ".join(part for part in contact if part)
+    if contact_line:
+        blocks.append(Block("contact", contact_line))
+
+    for section in sections:
+        if section == "profile" and resume.profile:
+            body = [Block("paragraph", resume.profile)]
+        elif section in ("skills", "languages", "hobbies"):
+            items = getattr(resume, section) or []
+            body = [Block("paragraph", ", ".join(items))] if items else []
+        elif section in ("experience", "education"):
+            body = [
+                Block("bullet", f"{key}: {value}" if value else key)
+                for entry in getattr(resume, section) or [] for key, value in entry.items()
+            ]
+        elif section == "projects":
+            body = [
+                Block("bullet", f"{name}: {description}" if description else name)
+                for name, description in (resume.projects or {}).items()
+            ]
+        else:
+            body = []
+        if body:
+            blocks.append(Block("heading", SECTION_TITLES.get(section, section.title())))
+            blocks += body
+    return blocks
+
+
+def _to_latin1(text: str) -> str:
+    text = text.translate(_LATIN1_FOLDS)
+    if not text.isascii():
+        try:
+            text.encode("latin-1")
+        except UnicodeEncodeError:
+            folded = []
+            for char in text:
+                if ord(char) > 255:
+                    # "ł" -> "l", anything without a Latin-1 base -> "?"
+                    base = unicodedata.normalize("NFKD", char)[0]
+                    char = base if ord(base) <= 255 else "?"
+                folded.append(char)
+            text = "".join(folded)
+    return text
+
+
+class PdfRenderer:
+    """Renders resumes to PDF bytes with fpdf2.
+
+    fpdf2's multi_cell re-measures every line character by character, which
+    dominates render time. Here lines are wrapped with word widths from the
+    font's metrics, cached across documents, and drawn with plain text
+    calls. Core font metrics are loaded once per process.
+    """
+
+    def __init__(self, template: ResumeTemplate = ResumeTemplate()):
+        from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+        self.template = template
+        self.family = template.font if template.font_path is None else "ResumeFont"
+        self._char_widths = None
+        if template.font_path is None:
+            family = template.font.lower()
+            self._char_widths = {
+                style: CORE_FONTS_CHARWIDTHS[f"{family}{style}"] for style in ("", "B")
+            }
+        # (style, word) -> width at 1pt, in mm
+        self._word_widths: dict[tuple[str, str], float] = {}
+        self._styles = {
+            "name": ("B", template.name_size),
+            "contact": ("", template.body_size),
+            "heading": ("B", template.heading_size),
+            "paragraph": ("", template.body_size),
+            "bullet": ("", template.body_size),
+        }
+
+    def _new_document(self):
+        from fpdf import FPDF
+
+        pdf = FPDF(unit="mm", format="A4")
+        pdf.set_auto_page_break(False)
+        pdf.set_margins(self.template.margin, self.template.margin)
+        if self.template.font_path is not None:
+            # fpdf2 ties a parsed TrueType font to one document
+            pdf.add_font(self.family, "", self.template.font_path)
+            pdf.add_font(self.family, "B", self.template.bold_font_path or self.template.font_path)
+        return pdf
+
+    def _width(self, pdf, style: str, word: str) -> float:
+        key = (style, word)
+        width = self._word_widths.get(key)
+        if width is None:
+            if self._char_widths is not None:
+                widths = self._char_widths[style]
+                width = sum(widths.get(char, 500) for char in word) * 0.001 * _MM_PER_PT
+            else:
+                pdf.set_font(self.family, style, 1)
+                width = pdf.get_string_width(word)
+            if len(self._word_widths) > 100_000:
+                self._word_widths.clear()
+            self._word_widths[key] = width
+        return width
+
+    def _wrap(self, pdf, text: str, style: str, size: float, max_width: float) -> list[str]:
+        space = self._width(pdf, style, " ") * size
+        lines, line, line_width = [], [], 0.0
+        for word in text.split():
+            width = self._width(pdf, style, word) * size
+            if width > max_width:
+                # A word wider than the line (a long URL) is broken by character
+                if line:
+                    lines.append(" ".join(line))
+                    line, line_width = [], 0.0
+                piece = ""
+                for char in word:
+                    if self._width(pdf, style, piece + char) * size > max_width and piece:
+                        lines.append(piece)
+                        piece = ""
+                    piece += char
+                word, width = piece, self._width(pdf, style, piece) * size
+            if line and line_width + space + width > max_width:
+                lines.append(" ".join(line))
+                line, line_width = [], 0.0
+            line_width += (space if line else 0) + width
+            line.append(word)
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+    def render(self, resume: Resume) -> bytes:
+        template = self.template
+        pdf = self._new_document()
+        pdf.add_page()
+        left, right = template.margin, pdf.w - template.margin
+        bottom = pdf.h - template.margin
+        bullet_indent = 4.0
+        y = template.margin
+
+        for kind, text in resume_blocks(resume, template.sections):
+            if self._char_widths is not None:
+                text = _to_latin1(text)
+            style, size = self._styles[kind]
+            line_height = size * template.line_spacing * _MM_PER_PT
+            x = left + bullet_indent if kind == "bullet" else left
+            if kind == "heading":
+                # Keep a heading with at least one line of its section
+                y += line_height * 0.5
+                if y + line_height * 2.5 > bottom:
+                    pdf.add_page()
+                    y = template.margin
+
+            # Wrap first: measuring a TrueType font changes the current font
+            lines = self._wrap(pdf, text, style, size, right - x) or [""]
+            pdf.set_font(self.family, style, size)
+            for i, line in enumerate(lines):
+                if y + line_height > bottom:
+                    pdf.add_page()
+                    y = template.margin
+                # text() places the baseline; ascenders take about 0.8 of the size
+                baseline = y + size * 0.8 * _MM_PER_PT
+                if kind == "bullet" and i == 0:
+                    pdf.text(left + 1, baseline, "-")
+                pdf.text(x, baseline, line)
+                y += line_height
+
+            if kind == "heading":
+                pdf.set_line_width(0.2)
+                pdf.line(left, y, right, y)
+                y += 1
+            elif kind in ("name", "contact"):
+                y += line_height * 0.3
+        return bytes(pdf.output())
+
+
+def _default_docx_path() -> str:
+    import docx
+    return os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+
+
+class DocxRenderer:
+    """Renders resumes to DOCX bytes from a precompiled package skeleton.
+
+    Loading a .docx with python-docx parses ~900 kB of style XML per
+    document. Instead, every part but word/document.xml is compressed once
+    into an in-memory zip; a render copies it and appends only the new
+    document body.
+    """
+
+    def __init__(self, template: ResumeTemplate = ResumeTemplate()):
+        self.template = template
+        path = template.docx_path or _default_docx_path()
+        with zipfile.ZipFile(path) as source:
+            names = source.namelist()
+            document = source.read("word/document.xml").decode("utf-8")
+            styles = source.read("word/styles.xml").decode("utf-8") if "word/styles.xml" in names else ""
+            skeleton = io.BytesIO()
+            with zipfile.ZipFile(skeleton, "w", zipfile.ZIP_DEFLATED) as target:
+                for name in names:
+                    if name != "word/document.xml":
+                        target.writestr(name, source.read(name))
+        self._skeleton = skeleton.getvalue()
+
+        # Everything around the body content: namespaces before, page setup after
+        body = document.index("<w:body>") + len("<w:body>")
+        section = document.rfind("<w:sectPr")
+        if section < body:
+            section = document.rindex("</w:body>")
+        self._head, self._tail = document[:body], document[section:]
+
+        # Template styles where they exist, direct formatting where not
+        style_ids = set(re.findall(r'w:styleId="([^"]+)"', styles))
+        self._paragraph_styles = {
+            kind: style if style in style_ids else None
+            for kind, style in (("name", "Title"), ("heading", "Heading1"), ("bullet", "ListBullet"))
+        }
+        self._run_formats = {
+            "name": f'<w:b/><w:sz w:val="{round(template.name_size * 2)}"/>',
+            "heading": f'<w:b/><w:sz w:val="{round(template.heading_size * 2)}"/>',
+            "contact": f'<w:sz w:val="{round(template.body_size * 2)}"/>',
+            "paragraph": f'<w:sz w:val="{round(template.body_size * 2)}"/>',
+            "bullet": f'<w:sz w:val="{round(template.body_size * 2)}"/>',
+        }
+
+    def _paragraph(self, kind: str, text: str) -> str:
+        style = self._paragraph_styles.get(kind)
+        paragraph_props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+        # Styled paragraphs take their look from the template
+        run_props = "" if style else f"<w:rPr>{self._run_formats[kind]}</w:rPr>"
+        if kind == "bullet" and not style:
+            text = f"• {text}"
+        text = escape(_XML_INVALID_RE.sub("", text))
+        return f'<w:p>{paragraph_props}<w:r>{run_props}<w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+    def render(self, resume: Resume) -> bytes:
+        body = "".join(
+            self._paragraph(kind, text) for kind, text in resume_blocks(resume, self.template.sections)
+        )
+        buffer = io.BytesIO(self._skeleton)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as package:
+            package.writestr("word/document.xml", f"{self._head}{body}{self._tail}")
+        return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_renderer(format: str, template: ResumeTemplate = ResumeTemplate()) -> PdfRenderer | DocxRenderer:
+    """Renderer for a format and template, compiled once per process."""
+    if format == "pdf":
+        return PdfRenderer(template)
+    if format == "docx":
+        return DocxRenderer(template)
+    raise ValueError(f"Unknown render format {format!r}, expected one of {RENDER_FORMATS}")
+
+
+def render_resume(resume: Resume, format: str = "pdf", template: ResumeTemplate = ResumeTemplate()) -> bytes:
+    with tracing.span("render.resume", format=format):
+        return get_renderer(format, template).render(resume)
+
+
+def _render_chunk(format: str, template: ResumeTemplate, resumes: list[dict]) -> list[bytes | Exception]:
+    # Runs in a worker process; the renderer is compiled on its first chunk
+    renderer = get_renderer(format, template)
+    results = []
+    for data in resumes:
+        try:
+            results.append(renderer.render(Resume(**data)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def render_batch(resumes: list[Resume], format: str = "pdf", template: ResumeTemplate = ResumeTemplate(),
+                 max_processes: int | None = None, parallel_min: int = 64,
+                 chunk_size: int | None = None) -> list[bytes | Exception]:
+    """Render many resumes, in input order; a failed render leaves its exception.
+
+    Batches of at least parallel_min resumes are spread over a process pool
+    in chunks, so each worker compiles the template once and pays one
+    round trip per chunk rather than per document.
+    """
+    get_renderer(format, template)  # fail fast on a bad format or template
+    processes = min(max_processes or os.cpu_count() or 1, len(resumes))
+    with tracing.span("render.batch", format=format, documents=len(resumes)) as span:
+        if len(resumes) < parallel_min or processes < 2:
+            span.set(processes=1)
+            results = _render_chunk(format, template, [resume.model_dump() for resume in resumes])
+        else:
+            chunk_size = chunk_size or max(1, -(-len(resumes) // (processes * 4)))
+            chunks = [
+                [resume.model_dump() for resume in resumes[start:start + chunk_size]]
+                for start in range(0, len(resumes), chunk_size)
+            ]
+            span.set(processes=processes, chunks=len(chunks))
+            results = []
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [executor.submit(_render_chunk, format, template, chunk) for chunk in chunks]
+                for future in futures:
+                    results += future.result()
+    failed = sum(isinstance(result, Exception) for result in results)
+    if failed:
+        logging.warning("%s/%s %s renders failed", failed, len(results), format)
+    return results
+
@@ -1,48 +1,136 @@
-from pypdf import PdfReader
 from backend.types import Resume
-from backend.model import Model
-from typing import Union
-import json
-import os 
+from backend.model import Model, model_task, TASK_EXTRACTION
+from backend.resume_store import ResumeStore, file_sha256
+from backend.structured_output import StructuredOutput
+from backend.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+from backend import tracing
+from typing import Union, Callable, Any
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+import asyncio
+import mmap
+import os
 import logging
-from datetime import datetime
 
 
-if not os.path.exists('logs'):
-    os.makedirs('logs')
+@contextmanager
+def _open_pdf(path: str):
+    from pypdf import PdfReader
+    from pypdf.errors import EmptyFileError
 
-current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_filename = os.path.join('logs', f"log_resume_reader_{current_time}.log")
+    # Map the file instead of reading it into memory; pypdf only needs a
+    # seekable stream and pulls objects in on demand
+    with open(path, "rb") as f:
+        # An empty file can't be mapped, fail the way PdfReader(path) does
+        if os.fstat(f.fileno()).st_size == 0:
+            raise EmptyFileError("Cannot read an empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield PdfReader(mm)
 
-logging.basicConfig(
-    level=logging.INFO,
-    filename=log_filename,
-    filemode='w',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
+def _page_parts(page) -> Iterator[str]:
+    if "/Annots" in page:
+        for annotation in page["/Annots"]:
+            obj = annotation.get_object()
+            if "/A" in obj and "/URI" in obj["/A"]:
+                yield obj["/A"]["/URI"]
+    yield page.extract_text()
 
 
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    # Runs in a worker process, each worker maps the file itself
+    with _open_pdf(path) as reader:
+        return [part for i in range(start, stop) for part in _page_parts(reader.pages[i])]
+
 
 class ResumeReader:
 
-    def __init__(self,resume_path:str,model:Model):
+    def __init__(self,resume_path:str,model:Model,store:ResumeStore|None=None,
+                 max_pages:int=50,max_bytes:int=20*1024*1024,
+                 parallel_pages:int=24,max_processes:int|None=None,
+                 taxonomy:SkillTaxonomy|None=None):
         self.resume_path = resume_path
         self.model = model
+        self.structured = StructuredOutput(model)
+        self.store = store
+        # Pages beyond max_pages are ignored, files over max_bytes are rejected
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        # Documents with at least this many pages are split across processes
+        self.parallel_pages = parallel_pages
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.taxonomy = taxonomy or get_skill_taxonomy()
+
+    @property
+    def parser_version(self) -> str:
+        # Changes whenever the extraction prompt, the skill taxonomy, the model
+        # or the page/byte budget changes; a smaller budget stores a truncated resume
+        template = (f"{self._create_prompt('{content}')}\0{self.taxonomy.version}"
+                    f"\0{self.max_pages}\0{self.max_bytes}")
+        return ResumeStore.make_version(template, self.model.model_name)
+
+    def _stored_resume(self) -> tuple[str | None, Resume | None]:
+        if self.store is None:
+            return None, None
+        pdf_hash = file_sha256(self.resume_path)
+        resume = self.store.get(pdf_hash, self.parser_version)
+        if resume is not None:
+            logging.info("Parsed resume found in store for %s", self.resume_path)
+        return pdf_hash, resume
+
+    def _canonical_skills(self, resume: Resume | None, content: str) -> Resume | None:
+        """Deduplicate skills under canonical names, tagging the text if the LLM found none."""
+        if resume is None:
+            return None
+        skills = self.taxonomy.merge(resume.skills)
+        if not skills:
+            skills = self.taxonomy.find(content)
+            logging.info("No skills parsed from %s, tagged %s in its text", self.resume_path, len(skills))
+        resume.skills = skills
+        return resume
+
+    def _remember(self, pdf_hash: str | None, resume: Resume | None) -> Resume | None:
+        if self.store is not None and pdf_hash and resume is not None:
+            self.store.put(pdf_hash, self.parser_version, resume)
+        return resume
     
-    def read_resume_pdf(self) -> str:
-        reader = PdfReader(self.resume_path)
-        content = ""
-        for page in reader.pages:
-            logging.info(f"Raw pdf page {page}")
-            if "/Annots" in page:
-                for annotation in page["/Annots"]:
-                    obj = annotation.get_object()
-                    if "/A" in obj and "/URI" in obj["/A"]:
-                        content+=obj["/A"]["/URI"]
-            content+=page.extract_text()
+    def iter_resume_pages(self) -> Iterator[str]:
+        """Yield hyperlinks and text page by page, within the page/byte budget."""
+        size = os.path.getsize(self.resume_path)
+        if size > self.max_bytes:
+            raise ValueError(f"Resume PDF is {size} bytes, over the {self.max_bytes} byte budget")
+
+        with _open_pdf(self.resume_path) as reader:
+            page_count = len(reader.pages)
+            tracing.annotate(pages=min(page_count, self.max_pages), bytes=size)
+            if page_count > self.max_pages:
+                logging.warning(
+                    "Resume PDF has %s pages, only reading the first %s", page_count, self.max_pages
+                )
+                page_count = self.max_pages
+
+            if page_count < self.parallel_pages or self.max_processes < 2:
+                for i in range(page_count):
+                    yield from _page_parts(reader.pages[i])
+                return
+
+        workers = min(self.max_processes, page_count)
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_page_range, self.resume_path, start, stop)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                yield from future.result()
 
+    def read_resume_pdf(self) -> str:
+        with tracing.span("resume.read_pdf") as span:
+            content = "\n".join(part for part in self.iter_resume_pages() if part)
+            span.set(chars=len(content))
+        logging.info("Extracted %s characters from %s", len(content), self.resume_path)
         return content
     
     def _create_prompt(self, content: str) -> str:
@@ -70,77 +158,46 @@ class ResumeReader:
         """
 
         
-    def parse_resume(self) -> Union[Resume, None]:
+    @tracing.traced("resume.parse")
+    def parse_resume(self, on_field: Callable[[str, Any], None] | None = None) -> Union[Resume, None]:
         try:
+            # The same PDF parsed with the same prompt and model needs no LLM call
+            pdf_hash, stored = self._stored_resume()
+            tracing.annotate(store_hit=stored is not None)
+            if stored is not None:
+                return stored
+
             # Read PDF content
             content = self.read_resume_pdf()
             
-            # Create and send prompt to LLM
+            # Create and send prompt to LLM, fields reach on_field as they complete
             prompt = self._create_prompt(content)
-            llm_response = self.model._run(prompt)
-            logging.info(f"LLM response for resume parsing: {llm_response}")
-            
-            try:
-                # Extract JSON from response
-                start_idx = llm_response.find('{')
-                end_idx = llm_response.rindex('}') + 1
-                json_str = llm_response[start_idx:end_idx]
-                resume_dict = json.loads(json_str)
-                logging.info(f"Resume dict: {resume_dict}")
-                
-                try:
-                    # Normalize phone_number
-                    if isinstance(resume_dict.get("phone_number"), str):
-                        resume_dict["phone_number"] = int(
-                            "".join(filter(str.isdigit, resume_dict["phone_number"]))
-                        )
-
-                    # Ensure all optional fields are present
-                    for field in Resume.__annotations__.keys():
-                        if field not in resume_dict:
-                            resume_dict[field] = None  # Default None for missing fields
-
-                    # Preprocess education entries
-                    if isinstance(resume_dict.get("education"), list):
-                        resume_dict["education"] = [
-                            {
-                                key: (value if isinstance(value, str) and value else "")
-                                for key, value in entry.items()
-                            }
-                            for entry in resume_dict["education"]
-                        ]
-                    # Preprocess education entries
-                    if isinstance(resume_dict.get("experience"), list):
-                        resume_dict["experience"] = [
-                            {
-                                key: (value if isinstance(value, str) and value else "")
-                                for key, value in entry.items()
-                            }
-                            for entry in resume_dict["experience"]
-                        ]
-                    # Handle optional list fields
-                    resume_dict["hobbies"] = resume_dict.get("hobbies") or []
-                    resume_dict["languages"] = resume_dict.get("languages") or []
-                    resume_dict["profile"] = resume_dict.get("profile") or ""
-
-                    # Create Resume object
-                    logging.info(f"Processed Resume dict for validation: {resume_dict}")
-                    return Resume(**resume_dict)
-
-                except ValueError as e:
-                    logging.error(f"Error creating Resume object: {e}")
-                    logging.error(f"Resume dict at error: {resume_dict}")
-                    return None
+            with model_task(TASK_EXTRACTION):
+                resume = self.structured.generate(prompt, Resume, "resume_parsing", on_field)
+            return self._remember(pdf_hash, self._canonical_skills(resume, content))
             
-            except json.JSONDecodeError as e:
-                logging.error(f"Error parsing LLM response as JSON: {e}")
-                logging.error(f"LLM response: {llm_response}")
-                return None
+        except Exception as e:
+            logging.error("Error processing resume: %s", e)
+            return None
+
+    async def aparse_resume(self) -> Union[Resume, None]:
+        try:
+            pdf_hash, stored = await asyncio.to_thread(self._stored_resume)
+            if stored is not None:
+                return stored
+
+            # PDF extraction is CPU bound, keep it off the event loop
+            content = await asyncio.to_thread(self.read_resume_pdf)
             
-            except ValueError as e:
-                logging.error(f"Error creating Resume object: {e}")
-                return None
+            prompt = self._create_prompt(content)
+            with model_task(TASK_EXTRACTION):
+                llm_response = await self.model._arun(prompt)
+                # Repair, validation and any field retries happen off the event loop
+                resume = await asyncio.to_thread(
+                    self.structured.finish, prompt, llm_response, Resume, "resume_parsing"
+                )
+            return self._remember(pdf_hash, self._canonical_skills(resume, content))
             
         except Exception as e:
-            logging.error(f"Error processing resume: {e}")
+            logging.error("Error processing resume: %s", e)
             return None
@@ -0,0 +1,107 @@
+from backend.types import Resume
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResumeStore:
+    """Validated Resume objects keyed by PDF content hash and parser version.
+
+    The version fingerprints the extraction prompt and model, so changing
+    either makes old entries miss; purge_stale() drops them from disk.
+    Resumes are stored as zlib-compressed JSON.
+    """
+
+    def __init__(self, path: str = os.path.join("cache", "resumes.sqlite3")):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resumes (
+                pdf_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                data BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (pdf_hash, version)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_version(prompt_template: str, model_name: str) -> str:
+        payload = f"{model_name}\0{prompt_template}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def get(self, pdf_hash: str, version: str) -> Resume | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM resumes WHERE pdf_hash = ? AND version = ?",
+                (pdf_hash, version)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return Resume.model_validate_json(zlib.decompress(row[0]))
+        except Exception as e:
+            # A schema change can make old entries unreadable, treat as a miss
+            logging.warning("Dropping unreadable stored resume %s: %s", pdf_hash[:12], e)
+            self.invalidate(pdf_hash, version)
+            return None
+
+    def put(self, pdf_hash: str, version: str, resume: Resume) -> None:
+        data = zlib.compress(resume.model_dump_json().encode("utf-8"), 9)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resumes (pdf_hash, version, data, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (pdf_hash, version, data, time.time())
+            )
+            self._conn.commit()
+
+    def invalidate(self, pdf_hash: str | None = None, version: str | None = None) -> int:
+        """Drop one version of a resume, all its versions, or everything when no hash is given."""
+        with self._lock:
+            if pdf_hash is None:
+                deleted = self._conn.execute("DELETE FROM resumes").rowcount
+            elif version is not None:
+                deleted = self._conn.execute(
+                    "DELETE FROM resumes WHERE pdf_hash = ? AND version = ?", (pdf_hash, version)
+                ).rowcount
+            else:
+                deleted = self._conn.execute(
+                    "DELETE FROM resumes WHERE pdf_hash = ?", (pdf_hash,)
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def purge_stale(self, current_version: str) -> int:
+        """Drop entries parsed with any other prompt/model version."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM resumes WHERE version != ?", (current_version,)
+            ).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,471 @@
+from functools import lru_cache
+from typing import Iterable, Iterator
+import bisect
+import hashlib
+import json
+import re
+
+
+# Canonical skill name -> other spellings. Matching folds case, and treats
+# spaces and hyphens alike, so "machine-learning" finds "Machine Learning".
+DEFAULT_SKILLS: dict[str, tuple[str, ...]] = {
+    # Languages
+    "Python": ("python3", "py3"),
+    "Java": (),
+    "JavaScript": ("js", "ecmascript", "es6"),
+    "TypeScript": ("ts",),
+    "C++": ("cpp", "c plus plus"),
+    "C#": ("csharp", "c sharp"),
+    "C": (),
+    "Go": ("golang",),
+    "Rust": (),
+    "Ruby": (),
+    "PHP": (),
+    "Kotlin": (),
+    "Swift": (),
+    "Objective-C": ("objc", "obj-c"),
+    "Scala": (),
+    "R": (),
+    "MATLAB": (),
+    "Julia": (),
+    "Perl": (),
+    "Lua": (),
+    "Haskell": (),
+    "Elixir": (),
+    "Erlang": (),
+    "Clojure": (),
+    "F#": ("fsharp",),
+    "Dart": (),
+    "Groovy": (),
+    "Fortran": (),
+    "COBOL": (),
+    "Assembly": ("asm",),
+    "Bash": ("shell scripting", "shell script", "bash scripting"),
+    "PowerShell": (),
+    "SQL": (),
+    "PL/SQL": ("plsql",),
+    "T-SQL": ("tsql", "transact-sql"),
+    "HTML": ("html5",),
+    "CSS": ("css3",),
+    "Sass": ("scss",),
+    "GraphQL": (),
+    "Solidity": (),
+    "VBA": (),
+    "Verilog": (),
+    "VHDL": (),
+    # Web and app frameworks
+    "React": ("react.js", "reactjs"),
+    "React Native": (),
+    "Angular": ("angularjs", "angular.js"),
+    "Vue.js": ("vue", "vuejs"),
+    "Svelte": (),
+    "Next.js": ("nextjs",),
+    "Nuxt.js": ("nuxt", "nuxtjs"),
+    "Redux": (),
+    "jQuery": (),
+    "Tailwind CSS": ("tailwind", "tailwindcss"),
+    "Bootstrap": (),
+    "Node.js": ("nodejs", "node"),
+    "Express": ("express.js", "expressjs"),
+    "NestJS": ("nest.js",),
+    "Django": (),
+    "Flask": (),
+    "FastAPI": (),
+    "Spring": (),
+    "Spring Boot": ("springboot",),
+    "Hibernate": (),
+    "Ruby on Rails": ("rails", "ror"),
+    "Laravel": (),
+    "Symfony": (),
+    ".NET": ("dotnet", ".net core", "asp.net", "asp.net core"),
+    "Flutter": (),
+    "SwiftUI": (),
+    "Jetpack Compose": (),
+    "Android": (),
+    "iOS": (),
+    "Electron": (),
+    "Unity": (),
+    "Unreal Engine": ("unreal",),
+    "Qt": (),
+    # Data stores
+    "PostgreSQL": ("postgres", "postgresql", "psql"),
+    "MySQL": (),
+    "MariaDB": (),
+    "SQLite": (),
+    "Oracle": ("oracle database", "oracle db"),
+    "SQL Server": ("mssql", "ms sql", "microsoft sql server"),
+    "MongoDB": ("mongo",),
+    "Redis": (),
+    "Cassandra": (),
+    "DynamoDB": (),
+    "Elasticsearch": ("elastic search", "elk"),
+    "OpenSearch": (),
+    "Neo4j": (),
+    "CouchDB": (),
+    "ClickHouse": (),
+    "Snowflake": (),
+    "BigQuery": ("google bigquery",),
+    "Redshift": ("amazon redshift",),
+    "Databricks": (),
+    "Delta Lake": (),
+    "Apache Iceberg": ("iceberg",),
+    "NoSQL": (),
+    # Data engineering
+    "Apache Spark": ("spark", "pyspark", "spark sql"),
+    "Hadoop": ("hdfs",),
+    "Apache Hive": ("hive",),
+    "Apache Kafka": ("kafka",),
+    "Apache Flink": ("flink",),
+    "Apache Beam": ("beam",),
+    "Airflow": ("apache airflow",),
+    "dbt": (),
+    "Dagster": (),
+    "Prefect": (),
+    "RabbitMQ": (),
+    "ETL": ("elt",),
+    "Data Warehousing": ("data warehouse", "data warehouses"),
+    "Data Modeling": ("data modelling",),
+    "pandas": (),
+    "NumPy": (),
+    "SciPy": (),
+    "Polars": (),
+    # Machine learning
+    "Machine Learning": ("ml",),
+    "Deep Learning": (),
+    "Natural Language Processing": ("nlp",),
+    "Computer Vision": (),
+    "Large Language Models": ("llm", "llms"),
+    "Generative AI": ("genai", "gen ai"),
+    "Retrieval-Augmented Generation": ("rag",),
+    "Reinforcement Learning": (),
+    "TensorFlow": (),
+    "PyTorch": ("torch",),
+    "Keras": (),
+    "scikit-learn": ("sklearn", "scikit"),
+    "XGBoost": (),
+    "LightGBM": (),
+    "Hugging Face": ("huggingface", "hugging face transformers"),
+    "LangChain": (),
+    "LangGraph": (),
+    "spaCy": (),
+    "OpenCV": (),
+    "MLflow": (),
+    "Kubeflow": (),
+    "MLOps": (),
+    "Statistics": ("statistical analysis",),
+    "A/B Testing": ("ab testing", "a/b tests", "experimentation"),
+    "Data Analysis": ("data analytics",),
+    "Data Visualization": ("data visualisation",),
+    "Jupyter": ("jupyter notebook", "jupyter notebooks"),
+    # BI and analytics
+    "Tableau": (),
+    "Power BI": ("powerbi",),
+    "Looker": (),
+    "Excel": ("microsoft excel", "ms excel"),
+    "Google Analytics": (),
+    # Cloud and infrastructure
+    "AWS": ("amazon web services",),
+    "Azure": ("microsoft azure",),
+    "Google Cloud": ("gcp", "google cloud platform"),
+    "AWS Lambda": ("lambda",),
+    "Amazon S3": ("s3",),
+    "Amazon EC2": ("ec2",),
+    "Docker": (),
+    "Kubernetes": ("k8s",),
+    "Helm": (),
+    "OpenShift": (),
+    "Terraform": (),
+    "Pulumi": (),
+    "CloudFormation": ("aws cloudformation",),
+    "Ansible": (),
+    "Chef": (),
+    "Puppet": (),
+    "Linux": (),
+    "Unix": (),
+    "Windows Server": (),
+    "Nginx": (),
+    "Apache HTTP Server": ("httpd",),
+    "Serverless": (),
+    "Microservices": ("microservice", "micro services", "micro-service architecture"),
+    "REST APIs": ("rest", "restful", "rest api", "restful apis", "restful api"),
+    "gRPC": (),
+    "WebSockets": ("websocket",),
+    "Distributed Systems": (),
+    "Networking": ("tcp/ip",),
+    # Delivery and tooling
+    "CI/CD": ("ci cd", "continuous integration", "continuous delivery", "continuous deployment"),
+    "Git": (),
+    "GitHub": (),
+    "GitHub Actions": (),
+    "GitLab": ("gitlab ci",),
+    "Bitbucket": (),
+    "Jenkins": (),
+    "CircleCI": (),
+    "Argo CD": ("argocd",),
+    "DevOps": (),
+    "Site Reliability Engineering": ("sre",),
+    "Prometheus": (),
+    "Grafana": (),
+    "Datadog": (),
+    "Splunk": (),
+    "OpenTelemetry": (),
+    "Observability": (),
+    "Jira": (),
+    "Confluence": (),
+    "Maven": (),
+    "Gradle": (),
+    "Webpack": (),
+    "Vite": (),
+    "npm": (),
+    # Testing
+    "Unit Testing": ("unit tests",),
+    "Test Automation": ("automated testing",),
+    "Selenium": (),
+    "Cypress": (),
+    "Playwright": (),
+    "Jest": (),
+    "pytest": (),
+    "JUnit": (),
+    "TDD": ("test-driven development", "test driven development"),
+    # Security
+    "Cybersecurity": ("cyber security", "information security", "infosec"),
+    "OAuth": ("oauth2", "oauth 2.0"),
+    "Penetration Testing": ("pentesting", "pen testing"),
+    "IAM": ("identity and access management",),
+    # Practices
+    "Agile": ("agile methodologies",),
+    "Scrum": (),
+    "Kanban": (),
+    "Object-Oriented Programming": ("oop", "object oriented programming", "object-oriented design"),
+    "Functional Programming": (),
+    "System Design": (),
+    "Design Patterns": (),
+    "Data Structures": (),
+    "Algorithms": (),
+    "Software Architecture": (),
+    "Code Review": ("code reviews",),
+    "UX Design": ("ux", "user experience"),
+    "UI Design": ("ui",),
+    "Figma": (),
+    "SEO": ("search engine optimization",),
+    "Project Management": (),
+    "Product Management": (),
+    "Stakeholder Management": (),
+    "Communication": ("communication skills",),
+    "Leadership": (),
+    "Mentoring": ("mentorship",),
+    "Problem Solving": ("problem-solving skills",),
+    "Teamwork": ("collaboration",),
+}
+
+# Spellings that are also everyday words ("go further", "react to") only
+# count when written exactly like this
+CASE_SENSITIVE_ALIASES = frozenset((
+    "Go", "C", "R", "Swift", "Rust", "Ruby", "Dart", "Julia", "Spring", "React", "Angular",
+    "Express", "Flask", "Chef", "Puppet", "Helm", "Unity", "Electron", "Excel", "Looker",
+    "Beam", "Hive", "Spark", "Lambda", "Node", "Oracle", "Leadership", "Communication",
+    "REST", "UI", "UX", "ML", "RAG", "SRE", "ELK", "ELT", "TS", "JS", "ROR", "Qt",
+    "Assembly", "Statistics", "Algorithms", "Networking", "Serverless", "Prefect", "Vite",
+    "Mentoring", "Teamwork", "Collaboration", "Observability", "Experimentation",
+))
+
+# Punctuation that separates tokens. Hyphens become tokens of their own, so
+# "machine-learning" still reads as two words but "C-level" is not "C".
+# "+", "#" and "." stay inside tokens for "C++", "C#" and "Node.js".
+# One-to-one ASCII tables keep str.translate on its fast path.
+_SEPARATORS = str.maketrans({char: " " for char in ",;:()[]{}<>\"'!?*|=`~^$%/\\"})
+_UNICODE_SEPARATORS = re.compile("[\u2022\u00b7\u2013\u2014\u2018\u2019\u201c\u201d\u00a0]")
+
+
+def _tokens(text: str) -> list[str]:
+    if not text.isascii():
+        text = _UNICODE_SEPARATORS.sub(" ", text)
+    return text.translate(_SEPARATORS).replace("-", " - ").split()
+
+
+def _fold(name: str) -> str:
+    return " ".join(token for token in _tokens(name.lower()) if token != "-")
+
+
+class SkillTaxonomy:
+    """Canonical skill names with their aliases, compiled for fast tagging.
+
+    Spellings are indexed as token tries. Tagging splits the text once with
+    str methods, intersects its token set with the first tokens of all
+    spellings, and only walks the trie where a candidate occurs, so most of
+    a text is never looked at from Python. Case is folded and hyphens read
+    as spaces; CASE_SENSITIVE_ALIASES only match with their exact case.
+    """
+
+    def __init__(self, skills: dict[str, Iterable[str]] | None = None,
+                 case_sensitive: Iterable[str] = CASE_SENSITIVE_ALIASES):
+        skills = DEFAULT_SKILLS if skills is None else skills
+        self.skills = {name: tuple(aliases) for name, aliases in skills.items()}
+        exact_spellings = {spelling.casefold(): spelling for spelling in case_sensitive}
+        # folded spelling -> canonical name, and the same for exact-case ones
+        self._folded: dict[str, str] = {}
+        self._exact: dict[str, str] = {}
+        # first token -> trie of the remaining tokens; "" marks a complete spelling
+        self._folded_trie: dict[str, dict] = {}
+        self._exact_trie: dict[str, dict] = {}
+        for name, aliases in self.skills.items():
+            for spelling in (name, *aliases):
+                exact = exact_spellings.get(spelling.casefold())
+                if exact is not None:
+                    self._exact.setdefault(exact, name)
+                    self._insert(self._exact_trie, _tokens(exact), name)
+                else:
+                    key = _fold(spelling)
+                    self._folded.setdefault(key, name)
+                    self._insert(self._folded_trie, key.split(), name)
+
+    @staticmethod
+    def _insert(trie: dict, tokens: list[str], name: str) -> None:
+        tokens = [token for token in tokens if token != "-"]
+        if not tokens:
+            return
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault("", name)
+
+    @classmethod
+    def from_json(cls, path: str) -> "SkillTaxonomy":
+        """Taxonomy from a {"Canonical": ["alias", ...]} JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def version(self) -> str:
+        # Changes whenever a skill or alias is added, removed or renamed
+        payload = json.dumps([self.skills, sorted(self._exact)], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def lookup(self, name: str) -> str | None:
+        """Canonical name for a spelling, or None if it is not in the taxonomy."""
+        name = name.strip()
+        return self._exact.get(name) or self._folded.get(_fold(name))
+
+    def canonical(self, name: str) -> str:
+        """Canonical name for a spelling; unknown skills keep their spelling."""
+        return self.lookup(name) or re.sub(r"\s+", " ", name.strip())
+
+    @staticmethod
+    def _candidates(tokens: list[str], trie: dict) -> tuple[list, list]:
+        """Tokens of the text that start a spelling: (multi-token, single-token).
+
+        Sentence-final periods stay on tokens, so "Python." is a candidate too.
+        """
+        multi, single = [], []
+        for token in set(tokens):
+            key = token[:-1] if token.endswith(".") and len(token) > 1 else token
+            node = trie.get(key)
+            if node is not None:
+                (single if len(node) == 1 and "" in node else multi).append((token, key))
+        return multi, single
+
+    @staticmethod
+    def _occurrences(tokens: list[str], token: str) -> Iterator[int]:
+        start = -1
+        while True:
+            try:
+                start = tokens.index(token, start + 1)
+            except ValueError:
+                return
+            yield start
+
+    def _walk(self, tokens: list[str], trie: dict, key: str, start: int) -> tuple[int, int, str] | None:
+        """Longest spelling starting at tokens[start] as (start, end, name)."""
+        node = trie[key]
+        best = (start + 1, node[""]) if "" in node else None
+        count = len(tokens)
+        i = start + 1
+        # A period ends the sentence, and the spelling with it
+        while i < count and not tokens[i - 1].endswith("."):
+            following = tokens[i]
+            if following == "-":
+                i += 1
+                continue
+            if len(following) > 1 and following.endswith(".") and following[:-1] in node:
+                following = following[:-1]
+            node = node.get(following)
+            if node is None:
+                break
+            i += 1
+            if "" in node:
+                best = (i, node[""])
+        if best is None:
+            return None
+        end, name = best
+        # Single letters ("C", "R") followed by a hyphen are words like "C-level"
+        if end == start + 1 and len(key) == 1 and end < count and tokens[end] == "-":
+            return None
+        return start, end, name
+
+    def find(self, text: str) -> list[str]:
+        """Canonical skills mentioned in text, in order of first mention."""
+        tokens = _tokens(text)
+        folded = _tokens(text.lower())
+        if len(folded) != len(tokens):
+            # Lowercasing changed where tokens split (rare non-ASCII letters)
+            folded = [token.lower() for token in tokens]
+        streams = [(folded, self._folded_trie), (tokens, self._exact_trie)]
+
+        # Spellings that can run over several tokens are matched everywhere,
+        # the longest winning where they overlap: "Apache Spark" over "Spark"
+        matches = []
+        singles = []
+        for stream, trie in streams:
+            multi, single = self._candidates(stream, trie)
+            singles += [(stream, trie, token, key) for token, key in single]
+            for token, key in multi:
+                for start in self._occurrences(stream, token):
+                    match = self._walk(stream, trie, key, start)
+                    if match is not None:
+                        matches.append(match)
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        spans = []
+        for match in matches:
+            if not spans or match[0] >= spans[-1][1]:
+                spans.append(match)
+        starts = [span[0] for span in spans]
+
+        # Single-token spellings only need their first occurrence outside those
+        for stream, trie, token, key in singles:
+            for start in self._occurrences(stream, token):
+                i = bisect.bisect_right(starts, start) - 1
+                if i >= 0 and spans[i][1] > start:
+                    continue
+                match = self._walk(stream, trie, key, start)
+                if match is not None:
+                    spans.append(match)
+                    break
+        spans.sort()
+        return list(dict.fromkeys(name for _, _, name in spans))
+
+    def merge(self, *groups: Iterable[str] | None) -> list[str]:
+        """Canonicalized, deduplicated union of skill lists, first mention first."""
+        return merge_skills(*groups, taxonomy=self)
+
+
+def merge_skills(*groups: Iterable[str] | None, taxonomy: SkillTaxonomy | None = None) -> list[str]:
+    """Ordered-set union of skill lists.
+
+    Skills are compared case-insensitively, after canonicalization when a
+    taxonomy is given, so "python", "Python" and "python3" collapse to the
+    first one seen. Blank entries are dropped.
+    """
+    merged: dict[str, str] = {}
+    for group in groups:
+        for skill in group or ():
+            if not isinstance(skill, str) or not skill.strip():
+                continue
+            name = taxonomy.canonical(skill) if taxonomy is not None else re.sub(r"\s+", " ", skill.strip())
+            merged.setdefault(name.casefold(), name)
+    return list(merged.values())
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """The built-in taxonomy, compiled once per process."""
+    return SkillTaxonomy()
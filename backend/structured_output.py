@@ -0,0 +1,285 @@
+from backend.model import Model
+from backend.types import Resume, JobDescription
+from backend import tracing
+from backend.logging_config import log_artifact
+from pydantic import BaseModel, ValidationError
+from collections import Counter, defaultdict
+from typing import Callable, Any
+import json
+import re
+import threading
+import logging
+
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_LITERALS = {"true": "true", "false": "false", "null": "null",
+             "True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+
+_stats: dict[str, Counter] = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def _count(prompt_type: str, event: str) -> None:
+    with _stats_lock:
+        _stats[prompt_type][event] += 1
+
+
+def parse_stats() -> dict[str, dict[str, int]]:
+    """Per prompt type counts of calls, repairs, parse/validation failures and retries."""
+    with _stats_lock:
+        return {prompt_type: dict(counts) for prompt_type, counts in _stats.items()}
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+
+
+def repair_json(text: str) -> str:
+    """Best-effort rewrite of near-JSON LLM output into valid JSON.
+
+    Drops preamble, code fences and trailing chatter, and fixes smart or
+    single quotes, Python literals, bare keys and words, // comments, raw
+    newlines in strings, trailing commas and unclosed brackets.
+    """
+    text = _FENCE_RE.sub("", text).translate(_SMART_QUOTES)
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in model output")
+
+    out: list[str] = []
+    stack: list[str] = []
+    quote = None
+    i, n = start, len(text)
+    while i < n:
+        c = text[i]
+        if quote:
+            if c == "\\" and i + 1 < n:
+                # \' is not a JSON escape, a bare ' is fine inside "..."
+                out.append("'" if text[i + 1] == "'" else text[i:i + 2])
+                i += 2
+                continue
+            if c == quote:
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+            else:
+                out.append(c)
+        elif c in "\"'":
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            stack.append(c)
+            out.append(c)
+        elif c in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                break
+        elif c == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif c.isdigit() or (c == "-" and i + 1 < n and text[i + 1].isdigit()):
+            j = i + 1
+            while j < n and (text[j].isdigit() or text[j] in ".eE+-"):
+                j += 1
+            out.append(text[i:j])
+            i = j
+            continue
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "_-"):
+                j += 1
+            word = text[i:j]
+            rest = text[j:].lstrip()
+            if word in _LITERALS and not rest.startswith(":"):
+                out.append(_LITERALS[word])
+            else:
+                out.append(json.dumps(word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if quote:
+        out.append('"')
+    while stack:
+        _drop_trailing_comma(out)
+        out.append(_CLOSERS[stack.pop()])
+    return "".join(out)
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    if isinstance(value, dict):
+        return [f"{k}: {v}" if v else str(k) for k, v in value.items()]
+    return list(value)
+
+
+def _as_str_dict(entry: Any) -> dict[str, str]:
+    if not isinstance(entry, dict):
+        return {"details": str(entry)} if entry else {}
+    return {str(key): (value if isinstance(value, str) and value else "")
+            for key, value in entry.items()}
+
+
+def normalize_resume(data: dict) -> dict:
+    resume = {field: data.get(field) for field in Resume.model_fields}
+
+    # Normalize phone_number
+    phone = resume["phone_number"]
+    if isinstance(phone, str):
+        digits = "".join(filter(str.isdigit, phone))
+        resume["phone_number"] = int(digits) if digits else None
+
+    if isinstance(resume["socials"], list):
+        resume["socials"] = {
+            k: v for entry in resume["socials"] if isinstance(entry, dict) for k, v in entry.items()
+        }
+    if isinstance(resume["socials"], dict):
+        resume["socials"] = {str(k): str(v) for k, v in resume["socials"].items() if v}
+
+    if isinstance(resume["projects"], list):
+        projects = {}
+        for entry in resume["projects"]:
+            if isinstance(entry, dict):
+                projects.update(_as_str_dict(entry))
+            elif entry:
+                projects[str(entry)] = ""
+        resume["projects"] = projects
+    elif isinstance(resume["projects"], dict):
+        resume["projects"] = _as_str_dict(resume["projects"])
+
+    for field in ("education", "experience"):
+        if resume[field] is not None:
+            entries = resume[field] if isinstance(resume[field], list) else [resume[field]]
+            resume[field] = [_as_str_dict(entry) for entry in entries]
+
+    resume["skills"] = [str(s) for s in _as_list(resume["skills"])]
+    # Handle optional list fields
+    resume["hobbies"] = [str(h) for h in _as_list(resume["hobbies"])]
+    resume["languages"] = [str(lang) for lang in _as_list(resume["languages"])]
+    resume["profile"] = resume["profile"] or ""
+    return resume
+
+
+def normalize_job(data: dict) -> dict:
+    job = {}
+    for field in ("job_poster", "job_title", "profile"):
+        value = data.get(field)
+        job[field] = value if isinstance(value, str) else ("" if value is None else str(value))
+    for field in ("required_skills", "tasks"):
+        job[field] = [str(item) for item in _as_list(data.get(field))]
+    return job
+
+
+NORMALIZERS: dict[type, Callable[[dict], dict]] = {
+    Resume: normalize_resume,
+    JobDescription: normalize_job,
+}
+
+
+class StructuredOutput:
+    """One place to get validated pydantic objects out of a Model.
+
+    Asks backends for JSON mode, repairs malformed output locally, validates
+    against the schema and, when some fields are still invalid, re-asks the
+    model for just those fields. Outcomes are counted per prompt type; see
+    parse_stats().
+    """
+
+    def __init__(self, model: Model, max_field_retries: int = 1):
+        self.model = model
+        self.max_field_retries = max_field_retries
+
+    def parse(self, text: str, prompt_type: str) -> dict:
+        """JSON object in text, repaired if needed. Raises ValueError if hopeless."""
+        _count(prompt_type, "responses")
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(text[start:end + 1])
+                if isinstance(data, dict):
+                    return data
+            except json.JSONDecodeError:
+                pass
+        try:
+            data = json.loads(repair_json(text))
+        except (ValueError, json.JSONDecodeError) as e:
+            _count(prompt_type, "parse_failures")
+            raise ValueError(f"Unparseable {prompt_type} output: {e}") from e
+        if not isinstance(data, dict):
+            _count(prompt_type, "parse_failures")
+            raise ValueError(f"{prompt_type} output is not a JSON object")
+        _count(prompt_type, "repaired")
+        return data
+
+    def _field_retry_prompt(self, prompt: str, data: dict, fields: list[str], errors: str) -> str:
+        return (
+            f"{prompt}\n\n"
+            f"Your previous answer was:\n{json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+            f"These fields were missing or invalid:\n{errors}\n\n"
+            f"Respond with a JSON object containing only these keys: {', '.join(fields)}."
+        )
+
+    def finish(self, prompt: str, text: str, schema: type[BaseModel], prompt_type: str) -> BaseModel | None:
+        """Validate a completion of prompt as schema, retrying only failing fields."""
+        log_artifact("completion", text, prompt_type=prompt_type)
+        normalize = NORMALIZERS.get(schema, lambda data: data)
+        try:
+            data = normalize(self.parse(text, prompt_type))
+        except ValueError as e:
+            logging.error("Error parsing LLM response as JSON: %s", e)
+            _count(prompt_type, "failures")
+            return None
+
+        for attempt in range(self.max_field_retries + 1):
+            try:
+                result = schema(**data)
+                if attempt:
+                    _count(prompt_type, "recovered")
+                return result
+            except ValidationError as e:
+                _count(prompt_type, "validation_failures")
+                if attempt == self.max_field_retries:
+                    logging.error("Error creating %s object: %s", schema.__name__, e)
+                    break
+                fields = sorted({str(error["loc"][0]) for error in e.errors() if error["loc"]})
+                logging.info("Re-asking model for invalid %s fields: %s", prompt_type, fields)
+                _count(prompt_type, "field_retries")
+                tracing.add("retries")
+                try:
+                    retry_text = self.model._run_json(
+                        self._field_retry_prompt(prompt, data, fields, str(e)), format="json"
+                    )
+                    patch = self.parse(retry_text, prompt_type)
+                except Exception as retry_error:
+                    logging.error("Field retry failed: %s", retry_error)
+                    break
+                data = normalize({**data, **{k: v for k, v in patch.items() if k in fields}})
+
+        _count(prompt_type, "failures")
+        return None
+
+    def generate(self, prompt: str, schema: type[BaseModel], prompt_type: str,
+                 on_field: Callable[[str, Any], None] | None = None) -> BaseModel | None:
+        _count(prompt_type, "calls")
+        with tracing.span("structured.generate", prompt_type=prompt_type) as span:
+            text = self.model._run_json(prompt, on_field, format="json")
+            result = self.finish(prompt, text, schema, prompt_type)
+            span.set(valid=result is not None)
+            return result
@@ -0,0 +1,43 @@
+from functools import lru_cache
+import logging
+
+
+# Encodings by model family; local models are counted with the closest
+# widely used BPE, which tracks llama-style tokenizers within a few percent
+_ENCODINGS = {
+    "gpt-4o": "o200k_base",
+    "gpt-4.1": "o200k_base",
+    "o1": "o200k_base",
+}
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    try:
+        import tiktoken
+    except ImportError:
+        logging.warning("tiktoken is not installed, falling back to estimated token counts")
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # The BPE file is downloaded on first use; offline that fails, and
+        # returning None caches the failure instead of retrying every call
+        logging.warning("Could not load tiktoken encoding %s (%s), falling back to estimated token counts", name, e)
+        return None
+
+
+def encoding_for(model_name: str | None) -> str:
+    for prefix, encoding in _ENCODINGS.items():
+        if model_name and model_name.startswith(prefix):
+            return encoding
+    return DEFAULT_ENCODING
+
+
+def count_tokens(text: str, model_name: str | None = None) -> int:
+    encoding = _encoding(encoding_for(model_name))
+    if encoding is None:
+        # Roughly four characters per token for English prose and JSON
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,397 @@
+from backend.model import Model
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+
+
+# Latency histogram buckets in seconds, from a cache hit to a slow local LLM
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Numeric span attributes that are summed into Prometheus counters
+COUNTED_ATTRS = (
+    "prompt_chars", "completion_chars", "cache_hits", "retries",
+    "pages", "chunks", "chars", "calls_saved", "prompt_tokens_saved", "hedges", "failovers",
+)
+
+METRIC_PREFIX = "resume_tailor"
+
+
+class Span:
+    """One timed unit of work. Attributes are plain JSON values."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent: "Span | None", attrs: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self.end = None
+        self.attrs = attrs
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: int | float = 1) -> None:
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for Span when tracing is off; every call is a no-op."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def add(self, key: str, amount: int | float = 1) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("resume_tailor_span", default=None)
+
+
+class _ActiveSpan:
+
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.span.end = time.time()
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current_span.reset(self.token)
+        except ValueError:
+            # Exited from another context, e.g. a generator closed elsewhere
+            pass
+        self.tracer._finish(self.span)
+        return False
+
+
+class Tracer:
+    """Collects finished spans into a JSONL file and Prometheus metrics.
+
+    Spans nest through a context variable, so work handed to threads via
+    bounded_map or asyncio.to_thread stays under the span that started it.
+    """
+
+    def __init__(self, jsonl_path: str | None = None, prometheus_path: str | None = None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._lock = threading.Lock()
+        self._file = None
+        if jsonl_path:
+            directory = os.path.dirname(jsonl_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._file = open(jsonl_path, "a", encoding="utf-8")
+        # span name -> count, errors, seconds, bucket counts and counted attrs
+        self._metrics: dict[str, dict] = {}
+        self._server = None
+
+    def span(self, name: str, **attrs: Any) -> _ActiveSpan:
+        return _ActiveSpan(self, Span(name, _current_span.get(), attrs))
+
+    def _finish(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        duration = span.duration
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+            metric = self._metrics.setdefault(span.name, {
+                "count": 0, "errors": 0, "seconds": 0.0,
+                "buckets": [0] * len(BUCKETS), "attrs": {},
+            })
+            metric["count"] += 1
+            metric["seconds"] += duration
+            if span.error:
+                metric["errors"] += 1
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    metric["buckets"][i] += 1
+            for key in COUNTED_ATTRS:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)):
+                    metric["attrs"][key] = metric["attrs"].get(key, 0) + value
+
+    def prometheus_text(self) -> str:
+        """Current metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = {name: {**m, "buckets": list(m["buckets"]), "attrs": dict(m["attrs"])}
+                       for name, m in self._metrics.items()}
+
+        seconds = f"{METRIC_PREFIX}_span_seconds"
+        lines = [
+            f"# HELP {seconds} Span wall-clock time by span name.",
+            f"# TYPE {seconds} histogram",
+        ]
+        for name, metric in sorted(metrics.items()):
+            for bound, count in zip(BUCKETS, metric["buckets"]):
+                lines.append(f'{seconds}_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'{seconds}_bucket{{span="{name}",le="+Inf"}} {metric["count"]}')
+            lines.append(f'{seconds}_sum{{span="{name}"}} {metric["seconds"]:.6f}')
+            lines.append(f'{seconds}_count{{span="{name}"}} {metric["count"]}')
+
+        errors = f"{METRIC_PREFIX}_span_errors_total"
+        lines += [f"# HELP {errors} Spans that ended with an exception.", f"# TYPE {errors} counter"]
+        for name, metric in sorted(metrics.items()):
+            lines.append(f'{errors}{{span="{name}"}} {metric["errors"]}')
+
+        for key in COUNTED_ATTRS:
+            counter = f"{METRIC_PREFIX}_{key}_total"
+            samples = [(name, m["attrs"][key]) for name, m in sorted(metrics.items()) if key in m["attrs"]]
+            if not samples:
+                continue
+            lines += [f"# HELP {counter} Sum of the {key} span attribute.", f"# TYPE {counter} counter"]
+            lines += [f'{counter}{{span="{name}"}} {value}' for name, value in samples]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | None = None) -> str:
+        """Write metrics for a node_exporter textfile collector; returns the path."""
+        path = path or self.prometheus_path
+        if not path:
+            raise ValueError("No Prometheus output path configured")
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Write then rename so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+    def serve_prometheus(self, port: int = 9464, host: str = "127.0.0.1") -> str:
+        """Serve /metrics from a background thread; returns the endpoint URL."""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def close(self) -> None:
+        if self.prometheus_path:
+            self.write_prometheus()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def configure_tracing(jsonl_path: str | None = os.path.join("logs", "trace.jsonl"),
+                      prometheus_path: str | None = None) -> Tracer:
+    """Turn tracing on for the process. Tracing is off until this is called."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = Tracer(jsonl_path, prometheus_path)
+        logging.info("Tracing spans to %s", jsonl_path or 'memory')
+        return _tracer
+
+
+def disable_tracing() -> None:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = None
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing a block as a child of the current span."""
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.span(name, **attrs)
+
+
+def current_span() -> Span | _NoopSpan:
+    if _tracer is None:
+        return NOOP_SPAN
+    return _current_span.get() or NOOP_SPAN
+
+
+def annotate(**attrs: Any) -> None:
+    """Set attributes on the current span, if any."""
+    current_span().set(**attrs)
+
+
+def add(key: str, amount: int | float = 1) -> None:
+    """Increment a counter attribute on the current span, if any."""
+    current_span().add(key, amount)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Decorator running every call of the function inside a span."""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedModel(Model):
+    """Wraps any Model and records a span per call.
+
+    Put it outermost, e.g. TracedModel(CachedModel(OssModel())), so cache
+    hits and retries inside the call are recorded on its span.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+        self.model_name = model.model_name or type(model).__name__
+        self.params = model.params
+        self.max_concurrency = model.max_concurrency
+        self.context_window = model.context_window
+
+    def _warm(self) -> None:
+        self.model._warm()
+
+    def _run(self, input) -> str:
+        with span("llm.run", model=self.model_name, prompt_chars=len(str(input))) as s:
+            response = self.model._run(input)
+            s.set(completion_chars=len(response) if isinstance(response, str) else 0)
+            return response
+
+    def _stream(self, input, format: str | None = None) -> Iterator[str]:
+        tracer = _tracer
+        if tracer is None:
+            yield from self.model._stream(input, format=format)
+            return
+        # The span is only current while the backend produces a piece, so
+        # spans the consumer opens between pieces don't nest under it, and
+        # the context variable is always reset in the context that set it
+        s = Span("llm.stream", _current_span.get(),
+                 {"model": self.model_name, "prompt_chars": len(str(input)), "format": format})
+        start = time.perf_counter()
+        chars = 0
+        stream = self.model._stream(input, format=format)
+        try:
+            while True:
+                token = _current_span.set(s)
+                try:
+                    piece = next(stream)
+                except StopIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                if not chars:
+                    s.set(first_piece_ms=round((time.perf_counter() - start) * 1000, 3))
+                chars += len(piece)
+                yield piece
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            token = _current_span.set(s)
+            try:
+                stream.close()
+            finally:
+                _current_span.reset(token)
+            # Set even when the consumer stopped early
+            s.set(completion_chars=chars)
+            s.end = time.time()
+            tracer._finish(s)
+
+    def _run_json(self, input, on_field: Callable[[str, Any], None] | None = None,
+                  format: str | None = None) -> str:
+        # Handed to the wrapped model whole: the base version would close its
+        # stream at the end of the object, before a CachedModel stores it
+        parent = _current_span.get()
+
+        def relay(key: str, value: Any) -> None:
+            # As with _stream, spans opened by the consumer don't nest under the call
+            token = _current_span.set(parent)
+            try:
+                on_field(key, value)
+            finally:
+                _current_span.reset(token)
+
+        with span("llm.stream", model=self.model_name, prompt_chars=len(str(input)), format=format) as s:
+            response = self.model._run_json(input, relay if on_field else None, format=format)
+            s.set(completion_chars=len(response))
+            return response
+
+    async def _arun(self, input) -> str:
+        with span("llm.arun", model=self.model_name, prompt_chars=len(str(input))) as s:
+            response = await self.model._arun(input)
+            s.set(completion_chars=len(response) if isinstance(response, str) else 0)
+            return response
@@ -0,0 +1,423 @@
+from backend.types import Resume
+from typing import NamedTuple, Iterable
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+
+
+FIELDS = tuple(Resume.model_fields)
+
+# Bit per Resume field in a variant's changed mask, for find(field=...)
+FIELD_BITS = {field: 1 << i for i, field in enumerate(FIELDS)}
+
+SKILL_CHANGES = ("added", "removed", "promoted", "demoted")
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def _canonical_json(data: dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _item_key(item) -> str:
+    return item if isinstance(item, str) else json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+class _Base:
+    """A base resume decoded once, with lookups used to encode deltas against it."""
+
+    __slots__ = ("base_id", "data", "zdict", "items", "index")
+
+    def __init__(self, base_id: str, data: dict):
+        self.base_id = base_id
+        self.data = data
+        # Deltas are compressed with the base as preset dictionary, so
+        # rewritten text that reuses the base's phrases costs little
+        self.zdict = _canonical_json(data)[-32768:]
+        self.items: dict[str, list] = {}
+        self.index: dict[str, dict] = {}
+        for field, value in data.items():
+            if isinstance(value, dict):
+                items = [list(pair) for pair in value.items()]
+            elif isinstance(value, list):
+                items = value
+            else:
+                continue
+            self.items[field] = items
+            index = {}
+            for i, item in enumerate(items):
+                index.setdefault(_item_key(item), i)
+            self.index[field] = index
+
+
+def _skill_ranks(skills: list[str] | None) -> dict[str, tuple[int, str]]:
+    ranks = {}
+    for position, skill in enumerate(skills or []):
+        ranks.setdefault(skill.casefold(), (position, skill))
+    return ranks
+
+
+def _encode(base: _Base, data: dict) -> dict:
+    """Field-level delta of data against the base.
+
+    Unchanged fields are left out. A list or dict field that only reorders,
+    drops or adds items is stored as a sequence where an int is the index of
+    an item in the base and anything else is a new item ([key, value] for
+    dicts). Other changed fields are stored whole.
+    """
+    delta = {}
+    for field in FIELDS:
+        value = data.get(field)
+        base_value = base.data.get(field)
+        if value == base_value:
+            continue
+        index = base.index.get(field)
+        if index is not None and type(value) is type(base_value):
+            items = [list(pair) for pair in value.items()] if isinstance(value, dict) else value
+            # An int item would read as a base index
+            if not any(isinstance(item, int) for item in items):
+                delta[field] = {"s": [index.get(_item_key(item), item) for item in items]}
+                continue
+        delta[field] = {"v": value}
+    return delta
+
+
+def _decode(base: _Base, delta: dict) -> dict:
+    data = dict(base.data)
+    for field, change in delta.items():
+        if "v" in change:
+            data[field] = change["v"]
+            continue
+        base_items = base.items[field]
+        items = [base_items[item] if isinstance(item, int) else item for item in change["s"]]
+        data[field] = dict(items) if isinstance(base.data[field], dict) else items
+    return data
+
+
+def skill_changes(base_skills: list[str] | None, skills: list[str] | None) -> list[tuple[str, str, int | None, int | None]]:
+    """(skill, change, base position, position) for every skill that moved.
+
+    Skills match case-insensitively. Promotion and demotion compare the
+    order of the skills both lists share, so adding one skill at the top
+    does not count as demoting every other skill.
+    """
+    base_ranks = _skill_ranks(base_skills)
+    ranks = _skill_ranks(skills)
+    shared_base = [key for key in base_ranks if key in ranks]
+    shared = [key for key in ranks if key in base_ranks]
+    shared_base_rank = {key: i for i, key in enumerate(shared_base)}
+
+    changes = []
+    for rank, key in enumerate(shared):
+        base_position = base_ranks[key][0]
+        if rank < shared_base_rank[key]:
+            changes.append((ranks[key][1], "promoted", base_position, ranks[key][0]))
+        elif rank > shared_base_rank[key]:
+            changes.append((ranks[key][1], "demoted", base_position, ranks[key][0]))
+    for key, (position, skill) in ranks.items():
+        if key not in base_ranks:
+            changes.append((skill, "added", None, position))
+    for key, (base_position, skill) in base_ranks.items():
+        if key not in ranks:
+            changes.append((skill, "removed", base_position, None))
+    return changes
+
+
+class StoredVariant(NamedTuple):
+    variant_id: str
+    base_id: str
+    # Names of the fields that differ from the base
+    changed: tuple[str, ...]
+    delta_bytes: int
+    full_bytes: int
+    created_at: float
+
+
+class VariantStore:
+    """Many tailored variants of a few base resumes, stored as deltas.
+
+    Each base Resume is stored once under the hash of its JSON. A variant
+    keeps only the fields that differ from its base (see _encode), as JSON
+    compressed with the base as zlib preset dictionary. Changed fields are
+    kept as a bit mask and skill moves in their own indexed table, so
+    queries like find(skill="Kubernetes", change="promoted") never decode
+    a delta.
+    """
+
+    def __init__(self, path: str = os.path.join("cache", "variants.sqlite3")):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self._bases: dict[str, _Base] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bases (
+                base_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS variants (
+                variant_id TEXT PRIMARY KEY,
+                base_id TEXT NOT NULL,
+                delta BLOB NOT NULL,
+                changed INTEGER NOT NULL,
+                full_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS variants_base ON variants (base_id);
+            CREATE TABLE IF NOT EXISTS variant_skills (
+                variant_id TEXT NOT NULL,
+                skill_key TEXT NOT NULL,
+                skill TEXT NOT NULL,
+                change TEXT NOT NULL,
+                base_position INTEGER,
+                position INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS variant_skills_skill ON variant_skills (skill_key, change);
+            CREATE INDEX IF NOT EXISTS variant_skills_variant ON variant_skills (variant_id);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def base_id(resume: Resume) -> str:
+        return hashlib.sha256(_canonical_json(resume.model_dump(mode="json"))).hexdigest()[:16]
+
+    def put_base(self, resume: Resume) -> str:
+        """Store a base resume once; returns its id."""
+        data = resume.model_dump(mode="json")
+        base_id = self.base_id(resume)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bases (base_id, data, created_at) VALUES (?, ?, ?)",
+                (base_id, zlib.compress(_canonical_json(data), 9), time.time())
+            )
+            self._conn.commit()
+            self._bases.setdefault(base_id, _Base(base_id, data))
+        return base_id
+
+    def _base(self, base_id: str) -> _Base | None:
+        base = self._bases.get(base_id)
+        if base is not None:
+            return base
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM bases WHERE base_id = ?", (base_id,)).fetchone()
+        if row is None:
+            return None
+        base = _Base(base_id, json.loads(zlib.decompress(row[0])))
+        with self._lock:
+            return self._bases.setdefault(base_id, base)
+
+    def get_base(self, base_id: str) -> Resume | None:
+        base = self._base(base_id)
+        return Resume.model_validate(base.data) if base is not None else None
+
+    def put(self, variant_id: str, base_id: str, resume: Resume) -> None:
+        self.put_many(base_id, [(variant_id, resume)])
+
+    def put_many(self, base_id: str, variants: Iterable[tuple[str, Resume]]) -> None:
+        """Store tailored variants of one base in a single transaction."""
+        base = self._base(base_id)
+        if base is None:
+            raise KeyError(f"Unknown base resume {base_id}")
+        now = time.time()
+        rows, skill_rows = [], []
+        for variant_id, resume in variants:
+            data = resume.model_dump(mode="json")
+            delta = _encode(base, data)
+            compressor = zlib.compressobj(9, zdict=base.zdict)
+            blob = compressor.compress(_canonical_json(delta)) + compressor.flush()
+            changed = sum(FIELD_BITS[field] for field in delta)
+            rows.append((variant_id, base_id, blob, changed, len(_canonical_json(data)), now))
+            skill_rows += [
+                (variant_id, skill.casefold(), skill, change, base_position, position)
+                for skill, change, base_position, position in skill_changes(base.data.get("skills"), data.get("skills"))
+            ]
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM variant_skills WHERE variant_id = ?", [(row[0],) for row in rows]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO variants (variant_id, base_id, delta, changed, full_bytes, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.executemany(
+                "INSERT INTO variant_skills (variant_id, skill_key, skill, change, base_position, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                skill_rows
+            )
+            self._conn.commit()
+
+    def _delta(self, base: _Base, blob: bytes) -> dict:
+        decompressor = zlib.decompressobj(zdict=base.zdict)
+        return json.loads(decompressor.decompress(blob) + decompressor.flush())
+
+    def _rows(self, variant_ids: list[str]) -> list[tuple]:
+        rows = []
+        with self._lock:
+            for start in range(0, len(variant_ids), _LOOKUP_BATCH):
+                batch = variant_ids[start:start + _LOOKUP_BATCH]
+                rows += self._conn.execute(
+                    "SELECT variant_id, base_id, delta FROM variants "
+                    f"WHERE variant_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+        return rows
+
+    def get_data(self, variant_ids: Iterable[str]) -> dict[str, dict]:
+        """Materialized variants as plain dicts, without pydantic validation."""
+        data = {}
+        for variant_id, base_id, blob in self._rows(list(dict.fromkeys(variant_ids))):
+            base = self._base(base_id)
+            try:
+                data[variant_id] = _decode(base, self._delta(base, blob))
+            except Exception as e:
+                # A missing base or schema change makes the delta unreadable, treat as a miss
+                logging.warning("Dropping unreadable variant %s: %s", variant_id, e)
+                self.invalidate(variant_id)
+        return data
+
+    def get_many(self, variant_ids: Iterable[str]) -> dict[str, Resume]:
+        return {
+            variant_id: Resume.model_validate(data)
+            for variant_id, data in self.get_data(variant_ids).items()
+        }
+
+    def get(self, variant_id: str) -> Resume | None:
+        return self.get_many([variant_id]).get(variant_id)
+
+    def delta(self, variant_id: str) -> dict | None:
+        """The stored field-level delta of a variant against its base."""
+        rows = self._rows([variant_id])
+        if not rows:
+            return None
+        _, base_id, blob = rows[0]
+        return self._delta(self._base(base_id), blob)
+
+    def diff(self, variant_id: str, other_id: str | None = None) -> dict[str, tuple]:
+        """Fields that differ, as {field: (before, after)}.
+
+        Compares the variant with its base, or with another variant.
+        """
+        rows = {row[0]: row for row in self._rows([variant_id] + ([other_id] if other_id else []))}
+        if variant_id not in rows or (other_id and other_id not in rows):
+            raise KeyError(f"Unknown variant {variant_id if variant_id not in rows else other_id}")
+        base = self._base(rows[variant_id][1])
+        after = _decode(base, self._delta(base, rows[variant_id][2]))
+        if other_id is None:
+            before = base.data
+        else:
+            other_base = self._base(rows[other_id][1])
+            before = _decode(other_base, self._delta(other_base, rows[other_id][2]))
+        return {
+            field: (before.get(field), after.get(field))
+            for field in FIELDS if before.get(field) != after.get(field)
+        }
+
+    def skill_changes(self, variant_id: str) -> list[tuple[str, str, int | None, int | None]]:
+        """Stored (skill, change, base position, position) rows of a variant."""
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(
+                "SELECT skill, change, base_position, position FROM variant_skills "
+                "WHERE variant_id = ? ORDER BY rowid",
+                (variant_id,)
+            )]
+
+    def find(self, skill: str | None = None, change: str | None = None,
+             field: str | None = None, base_id: str | None = None) -> list[str]:
+        """Ids of variants matching every given filter.
+
+        skill and change filter on skill moves against the base (change is
+        one of SKILL_CHANGES; without a skill, any skill). field selects
+        variants where that Resume field differs from the base.
+        """
+        if change is not None and change not in SKILL_CHANGES:
+            raise ValueError(f"Unknown skill change {change!r}, expected one of {SKILL_CHANGES}")
+        if field is not None and field not in FIELD_BITS:
+            raise ValueError(f"Unknown Resume field {field!r}")
+        conditions, params = [], []
+        if skill is not None or change is not None:
+            skill_conditions, skill_params = [], []
+            if skill is not None:
+                skill_conditions.append("skill_key = ?")
+                skill_params.append(skill.casefold())
+            if change is not None:
+                skill_conditions.append("change = ?")
+                skill_params.append(change)
+            conditions.append(
+                f"variant_id IN (SELECT variant_id FROM variant_skills WHERE {' AND '.join(skill_conditions)})"
+            )
+            params += skill_params
+        if field is not None:
+            conditions.append("changed & ? != 0")
+            params.append(FIELD_BITS[field])
+        if base_id is not None:
+            conditions.append("base_id = ?")
+            params.append(base_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                f"SELECT variant_id FROM variants{where} ORDER BY rowid", params
+            )]
+
+    def info(self, variant_id: str) -> StoredVariant | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT variant_id, base_id, changed, length(delta), full_bytes, created_at "
+                "FROM variants WHERE variant_id = ?",
+                (variant_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        variant_id, base_id, changed, delta_bytes, full_bytes, created_at = row
+        fields = tuple(field for field in FIELDS if changed & FIELD_BITS[field])
+        return StoredVariant(variant_id, base_id, fields, delta_bytes, full_bytes, created_at)
+
+    def stats(self) -> dict:
+        """Variant count and stored bytes against the full JSON they stand for."""
+        with self._lock:
+            variants, delta_bytes, full_bytes = self._conn.execute(
+                "SELECT count(*), coalesce(sum(length(delta)), 0), coalesce(sum(full_bytes), 0) FROM variants"
+            ).fetchone()
+            bases, base_bytes = self._conn.execute(
+                "SELECT count(*), coalesce(sum(length(data)), 0) FROM bases"
+            ).fetchone()
+        stored = delta_bytes + base_bytes
+        return {
+            "bases": bases,
+            "variants": variants,
+            "stored_bytes": stored,
+            "full_bytes": full_bytes,
+            "ratio": round(full_bytes / stored, 2) if stored else None,
+        }
+
+    def invalidate(self, variant_id: str | None = None) -> int:
+        """Drop one variant, or every variant and base when no id is given."""
+        with self._lock:
+            if variant_id is None:
+                deleted = self._conn.execute("DELETE FROM variants").rowcount
+                self._conn.execute("DELETE FROM variant_skills")
+                self._conn.execute("DELETE FROM bases")
+                self._bases.clear()
+            else:
+                deleted = self._conn.execute(
+                    "DELETE FROM variants WHERE variant_id = ?", (variant_id,)
+                ).rowcount
+                self._conn.execute("DELETE FROM variant_skills WHERE variant_id = ?", (variant_id,))
+            self._conn.commit()
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
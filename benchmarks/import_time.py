@@ -0,0 +1,102 @@
+"""Import-time guard for the backend package.
+
+Imports each backend module in a fresh interpreter and fails if it takes
+longer than its budget or drags in a heavy dependency that should only be
+loaded on first use.
+
+    python -m benchmarks.import_time [--budget-ms 400] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+MODULES = [
+    "backend.model",
+    "backend.cache",
+    "backend.resume_reader",
+    "backend.job_parser",
+    "backend.resume_generation",
+    "backend.agent",
+    "backend.ats_score",
+    "backend.prompt_compiler",
+    "backend.structured_output",
+    "backend.resume_store",
+    "backend.batch",
+    "backend.fake_model",
+    "backend.content_extraction",
+    "backend.job_store",
+    "backend.skill_taxonomy",
+    "backend.rendering",
+    "backend.variant_store",
+]
+
+# Must never be imported as a side effect of importing a backend module
+HEAVY_MODULES = [
+    "spacy", "numpy", "seleniumbase", "selenium", "bs4", "lxml",
+    "langchain", "langchain_core", "langchain_text_splitters", "langchain_openai",
+    "langgraph", "ollama", "httpx", "requests", "pypdf", "fpdf", "docx",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str, repeat: int) -> dict:
+    timings = []
+    heavy = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            error = (process.stderr.strip().splitlines() or ["unknown error"])[-1]
+            return {"module": module, "best_ms": None, "heavy": [], "error": error}
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy = result["heavy"]
+    return {"module": module, "best_ms": min(timings) * 1000, "heavy": heavy, "error": None}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=400.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = [measure(module, args.repeat) for module in MODULES]
+    failed = False
+    for result in results:
+        status = "ok"
+        if result["error"]:
+            print(f"{result['module']:<28} {'-':>8}     FAIL {result['error']}")
+            failed = True
+            continue
+        if result["heavy"]:
+            status = f"FAIL eagerly imports {', '.join(result['heavy'])}"
+            failed = True
+        elif result["best_ms"] > args.budget_ms:
+            status = f"FAIL over {args.budget_ms:.0f}ms budget"
+            failed = True
+        print(f"{result['module']:<28} {result['best_ms']:8.1f} ms  {status}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Scaling benchmark for ResumeReader.read_resume_pdf.
+
+Generates synthetic resume PDFs of 1-200 pages (text plus link
+annotations) and times extraction sequentially and with the process pool.
+
+    python -m benchmarks.pdf_extraction [--pages 1 10 50 200] [--json out.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from backend.resume_reader import ResumeReader
+
+
+LINE = (
+    "Senior software engineer with experience in Python, distributed systems, "
+    "data pipelines and cloud infrastructure. Led teams delivering ML platforms."
+)
+
+
+def make_pdf(path: str, pages: int) -> None:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=10)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 8, f"Portfolio page {page + 1}", link=f"https://example.com/project/{page}")
+        pdf.ln()
+        # Each line wraps once, 20 of them fill one page without spilling over
+        for _ in range(20):
+            pdf.multi_cell(0, 5, LINE, new_x="LMARGIN", new_y="NEXT")
+    if pdf.pages_count != pages:
+        raise RuntimeError(f"Fixture PDF has {pdf.pages_count} pages, expected {pages}")
+    pdf.output(path)
+
+
+def measure(path: str, pages: int, parallel: bool, repeat: int) -> dict:
+    reader = ResumeReader(
+        path, model=None, max_pages=pages,
+        parallel_pages=1 if parallel else pages + 1
+    )
+    timings = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = reader.read_resume_pdf()
+        timings.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "pages": pages,
+        "mode": "process_pool" if parallel else "sequential",
+        "best_s": min(timings),
+        "pages_per_s": pages / min(timings),
+        "peak_mb": peak / 1e6,
+        "chars": len(content),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"resume_{pages}.pdf")
+            make_pdf(path, pages)
+            for parallel in (False, True):
+                result = measure(path, pages, parallel, args.repeat)
+                results.append(result)
+                print(
+                    f"{pages:>4} pages {result['mode']:<13} {result['best_s'] * 1000:9.1f} ms "
+                    f"{result['pages_per_s']:8.1f} pages/s  peak {result['peak_mb']:6.1f} MB"
+                )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput benchmark for backend.rendering.
+
+Renders a batch of synthetic tailored resumes to PDF and DOCX, sequentially
+and over the process pool, and reports documents per second.
+
+    python -m benchmarks.rendering [--count 1000] [--processes 1 2 4] [--json out.json]
+"""
+import argparse
+import json
+import time
+
+from backend.rendering import render_batch
+from backend.types import Resume
+from benchmarks.stages import BASE_RESUME
+
+
+def make_resumes(count: int) -> list[Resume]:
+    resumes = []
+    for i in range(count):
+        data = dict(BASE_RESUME)
+        data["full_name"] = f"Alex Doe {i}"
+        data["experience"] = BASE_RESUME["experience"] * (1 + i % 4)
+        resumes.append(Resume.model_validate(data))
+    return resumes
+
+
+def measure(resumes: list[Resume], format: str, processes: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = render_batch(resumes, format=format, max_processes=processes, parallel_min=2)
+        timings.append(time.perf_counter() - start)
+    failed = sum(isinstance(result, Exception) for result in results)
+    return {
+        "format": format,
+        "processes": processes,
+        "documents": len(resumes),
+        "best_s": min(timings),
+        "docs_per_s": len(resumes) / min(timings),
+        "mean_kb": sum(len(r) for r in results if isinstance(r, bytes)) / max(1, len(results) - failed) / 1e3,
+        "failed": failed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx"])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    resumes = make_resumes(args.count)
+    results = []
+    for format in args.formats:
+        for processes in args.processes:
+            result = measure(resumes, format, processes, args.repeat)
+            results.append(result)
+            print(
+                f"{format:<5} {processes:>2} processes {result['best_s'] * 1000:9.1f} ms "
+                f"{result['docs_per_s']:8.1f} docs/s  {result['mean_kb']:6.1f} kB/doc"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Tail-latency benchmark for RoutedModel.
+
+Routes calls to a fake backend that stalls on a share of its calls, with
+a steady second backend behind it, and compares latency percentiles with
+and without hedging.
+
+    python -m benchmarks.routing [--calls 200] [--stall-rate 0.03] [--json out.json]
+"""
+import argparse
+import json
+import random
+import time
+
+from backend.fake_model import FakeModel
+from backend.model import RoutedModel
+
+
+class StallingModel(FakeModel):
+    """FakeModel that takes `stall` seconds instead of `latency` on a share of calls."""
+
+    def __init__(self, stall: float, stall_rate: float, seed: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self._stalls = random.Random(seed)
+
+    def _run(self, input) -> str:
+        time.sleep(self.stall if self._stalls.random() < self.stall_rate else self.latency)
+        return self._complete(input)
+
+
+def measure(args, hedge: bool, hedge_after: float | None) -> dict:
+    primary = StallingModel(args.stall, args.stall_rate, latency=args.latency, model_name="primary")
+    backup = FakeModel(latency=args.backup_latency, model_name="backup")
+    router = RoutedModel({"extraction": [primary, backup]}, hedge=hedge, hedge_after=hedge_after)
+    timings = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        router._run("prompt")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "mode": "no_hedge" if not hedge else f"hedge_after_{hedge_after}" if hedge_after else "hedge_p95",
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[int(0.95 * len(timings))] * 1000,
+        "p99_ms": timings[int(0.99 * len(timings))] * 1000,
+        "backend_calls": primary.calls + backup.calls,
+        "calls": args.calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--stall", type=float, default=0.5)
+    parser.add_argument("--stall-rate", type=float, default=0.03)
+    parser.add_argument("--backup-latency", type=float, default=0.03)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for hedge, hedge_after in ((False, None), (True, None), (True, 2 * args.latency)):
+        result = measure(args, hedge, hedge_after)
+        results.append(result)
+        print(
+            f"{result['mode']:<18} p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+            f"p99 {result['p99_ms']:7.1f} ms  {result['backend_calls'] / result['calls']:.2f} backend calls/call"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
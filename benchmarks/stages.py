@@ -0,0 +1,425 @@
+"""Offline stage-level benchmark for the tailoring pipeline.
+
+Runs every stage against local fixtures and a deterministic FakeModel, so
+results depend on this code rather than on Chrome, the network or an LLM:
+synthetic resume PDFs for ResumeReader, generated job pages served over
+local HTTP for JobParser.scrape_job, and canned completions for parsing,
+generation and the LangGraph agent. Each stage reports latency, throughput
+and peak Python heap; results are written as JSON and can be compared
+against a previous run to catch regressions between commits.
+
+    python -m benchmarks.stages [--repeat 5] [--latency 0.05] [--json out.json]
+    python -m benchmarks.stages --compare baseline.json [--tolerance 0.2]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from backend.fake_model import FakeModel
+from benchmarks.pdf_extraction import make_pdf
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOB_SKILLS = [
+    "Python", "Kubernetes", "PostgreSQL", "Kafka",
+    "Terraform", "Airflow", "Docker", "AWS",
+]
+JOB_TASKS = [
+    "Design and operate batch and streaming data pipelines",
+    "Own the reliability of the Kubernetes platform",
+    "Mentor engineers and review infrastructure changes",
+]
+
+BASE_RESUME = {
+    "full_name": "Alex Doe",
+    "phone_number": 5550100,
+    "location": "Berlin",
+    "socials": {"github": "https://github.com/alexdoe"},
+    "profile": "Backend engineer building data services in Python.",
+    "skills": ["Python", "Docker", "SQL", "Git", "Linux"],
+    "education": [{"BSc Computer Science": "TU Berlin, 2016"}],
+    "experience": [
+        {"Acme": "Built Python services and ETL jobs for analytics"},
+        {"Globex": "Maintained Linux servers and Docker based deployments"},
+    ],
+    "projects": {"pipeline-kit": "Open source helpers for data pipelines"},
+    "hobbies": ["climbing"],
+    "languages": ["English", "German"],
+}
+
+JOB_CHUNK_RESPONSE = json.dumps({
+    "job_poster": "Initech",
+    "job_title": "Data Platform Engineer",
+    "required_skills": JOB_SKILLS,
+    "tasks": JOB_TASKS,
+    "profile": "Engineer comfortable owning data infrastructure end to end",
+})
+
+# What models really send back: chatter, a code fence, single quotes,
+# Python literals, a bare key and trailing commas
+MESSY_RESUME_RESPONSE = """Sure! Here is the resume:
+```json
+{
+  'full_name': 'Alex Doe',
+  "phone_number": "+49 555-0100",
+  location: "Berlin",
+  "socials": [{"github": "https://github.com/alexdoe"}],
+  "profile": "Backend engineer building data services in Python.",
+  "skills": "Python, Docker, SQL, Git, Linux",
+  "education": [{"BSc Computer Science": "TU Berlin, 2016"},],
+  "experience": [
+    {"Acme": "Built Python services and ETL jobs for analytics"},
+    {"Globex": "Maintained Linux servers and Docker based deployments"},
+  ],
+  "projects": {"pipeline-kit": "Open source helpers for data pipelines"},
+  "hobbies": None,
+  "languages": ["English", "German"],
+}
+```
+Let me know if you need changes."""
+
+ALIGNMENT_RESPONSE = (
+    "1. Missing required skills: see the keyword list.\n"
+    "2. Quantify the ETL work.\n3. Mirror the posting's wording.\n4. Lead with experience."
+)
+
+PARAGRAPH = (
+    "As a Data Platform Engineer you will design, build and operate the batch and "
+    "streaming pipelines that power analytics. Requirements: strong Python, "
+    "Kubernetes, PostgreSQL, Kafka and Terraform experience. Responsibilities "
+    "include owning reliability, mentoring engineers and reviewing changes. "
+)
+BOILERPLATE = (
+    "Cookie settings Privacy policy Sign in Join now Similar jobs People also viewed "
+    "Explore collaborative articles Get the app Language Accessibility User agreement "
+)
+
+
+def _current_resume(prompt: str) -> dict:
+    # The correction prompt embeds the resume being corrected
+    start = prompt.find("{", prompt.find("Current resume:"))
+    resume, _ = json.JSONDecoder().raw_decode(prompt[start:])
+    return resume
+
+
+def canned_responder(prompt: str) -> str:
+    """Deterministic completion for every prompt the pipeline sends."""
+    if "job description parser" in prompt:
+        return JOB_CHUNK_RESPONSE
+    if "Analyze alignment" in prompt:
+        return ALIGNMENT_RESPONSE
+    if "Correct the resume" in prompt:
+        # Each correction adds one missing job skill, so the agent makes
+        # steady progress and runs several iterations before converging
+        resume = _current_resume(prompt)
+        known = {skill.lower() for skill in resume.get("skills") or []}
+        missing = [skill for skill in JOB_SKILLS if skill.lower() not in known]
+        resume["skills"] = (resume.get("skills") or []) + missing[:1]
+        return json.dumps(resume)
+    return json.dumps(BASE_RESUME)
+
+
+def job_page(kb: int) -> str:
+    """A job posting wrapped in the chrome real job boards put around it.
+
+    About a quarter of the page is the posting; the rest is a cookie
+    banner, navigation and a long "similar jobs" list.
+    """
+    unit = len(PARAGRAPH) + 3 * (len(BOILERPLATE) + 48)
+    repeats = max(1, kb * 1024 // unit)
+    posting = "".join(f"<p>{PARAGRAPH}</p>" for _ in range(repeats))
+    similar = "".join(
+        f"<li><a href='/jobs/{i}'>Similar job {i}</a> <span>{BOILERPLATE}</span></li>"
+        for i in range(3 * repeats)
+    )
+    return (
+        "<html><head><title>Data Platform Engineer at Initech</title>"
+        "<style>.section{margin:0}</style><script>window.dataLayer=[];</script></head>"
+        "<body><header>Initech careers</header><nav><a href='/'>Home</a> <a href='/jobs'>Jobs</a></nav>"
+        f"<div id='cookie-banner'>{BOILERPLATE}</div>"
+        "<div class='layout'><div class='job-header'><h1>Data Platform Engineer</h1><span>Initech, Berlin</span></div>"
+        f"<div class='job-description'>{posting}</div>"
+        f"<div class='similar-jobs'><h3>Similar jobs</h3><ul>{similar}</ul></div></div>"
+        f"<footer>{BOILERPLATE}</footer></body></html>"
+    )
+
+
+@contextmanager
+def serve_pages(pages: dict[str, str]):
+    """Serve {path: html} on a local port, yield the base URL."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            page = pages.get(self.path)
+            if page is None:
+                self.send_error(404)
+                return
+            body = page.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = httpd.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def _no_browser():
+    raise RuntimeError("benchmarks never launch a browser")
+
+
+def measure(stage: str, fn: Callable[[], int], repeat: int, unit: str) -> dict:
+    """Time fn repeat times; fn returns how many units of work it did.
+
+    Peak heap comes from one extra traced run so tracing does not skew the
+    timings.
+    """
+    fn()  # warm caches and lazy imports
+    timings, items = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    best = timings[0]
+    return {
+        "stage": stage,
+        "unit": unit,
+        "items": items,
+        "best_ms": best * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000,
+        "throughput_per_s": items / best if best else None,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def _skipped(stage: str, reason: str) -> dict:
+    return {"stage": stage, "skipped": reason}
+
+
+def run_stages(args, tmp: str, base_url: str) -> list[dict]:
+    from backend.types import Resume, JobDescription
+    from backend.browser_pool import DriverPool
+    from backend.resume_reader import ResumeReader
+    from backend.job_parser import JobParser
+    from backend.resume_generation import ResumeGenerator
+    from backend.structured_output import StructuredOutput
+
+    model = FakeModel(canned_responder, latency=args.latency, token_latency=args.token_latency)
+    no_browser = DriverPool(size=1, factory=_no_browser)
+    results = []
+
+    def run(stage: str, fn: Callable[[], int], unit: str):
+        try:
+            result = measure(stage, fn, args.repeat, unit)
+        except ImportError as e:
+            result = _skipped(stage, f"missing dependency: {e.name}")
+        results.append(result)
+        if "skipped" in result:
+            print(f"{stage:<20} skipped ({result['skipped']})")
+        else:
+            print(
+                f"{stage:<20} {result['best_ms']:9.2f} ms best {result['p95_ms']:9.2f} ms p95 "
+                f"{result['throughput_per_s'] or 0:10.1f} {unit}/s  peak {result['peak_mb']:7.2f} MB"
+            )
+
+    # Resume side
+    pdf_path = os.path.join(tmp, "resume.pdf")
+    try:
+        make_pdf(pdf_path, args.pages)
+    except ImportError as e:
+        pdf_path = None
+        results.append(_skipped("pdf_extraction", f"missing dependency: {e.name}"))
+    if pdf_path:
+        pages = args.pages
+        reader = ResumeReader(pdf_path, model, max_pages=pages)
+        run("pdf_extraction", lambda: reader.read_resume_pdf() and pages, "pages")
+
+        def parse_resume() -> int:
+            return int(reader.parse_resume() is not None)
+        run("resume_parsing", parse_resume, "resumes")
+
+    # Job side: fetch over local HTTP, clean, chunk, filter, LLM fan-out
+    try:
+        job_parser = JobParser(f"{base_url}/jobs/1", model, driver_pool=no_browser, min_content_chars=200)
+    except ImportError as e:
+        job_parser = None
+        for stage in ("job_scrape", "html_cleaning", "chunking", "skill_tagging", "semantic_filter", "job_parsing"):
+            results.append(_skipped(stage, f"missing dependency: {e.name}"))
+    if job_parser:
+        page = job_page(args.html_kb)
+        run("job_scrape", lambda: len(job_parser.scrape_job()), "chunks")
+        run("html_cleaning", lambda: len(job_parser._clean_page(page)) and 1, "pages")
+        text = job_parser._clean_page(page)
+        chunks = job_parser.split_text(text)
+        run("chunking", lambda: len(job_parser.split_text(text)), "chunks")
+        if "skipped" not in results[-1]:
+            report = job_parser.last_chunking_report
+            for key in ("mode", "calls", "fixed_calls", "prompt_tokens", "fixed_prompt_tokens"):
+                results[-1][key] = report[key]
+
+        def tag_skills() -> int:
+            job_parser.taxonomy.find(text)
+            return len(text) // 1000
+        run("skill_tagging", tag_skills, "kB")
+        if job_parser.nlp is None:
+            results.append(_skipped("semantic_filter", "spaCy or its en_core_web_sm model not installed"))
+        else:
+            run("semantic_filter", lambda: len(job_parser._semantic_chunk_filter(chunks)) and len(chunks), "chunks")
+        run("job_parsing", lambda: int(job_parser.job_parser(chunks) is not None) and len(chunks), "chunks")
+
+    # Generation side
+    base_resume = Resume(**BASE_RESUME)
+    job = JobDescription(**json.loads(JOB_CHUNK_RESPONSE))
+    generator = ResumeGenerator(model)
+    run("prompt_building", lambda: len(generator._resume_generation_prompt(base_resume, job)) and 1, "prompts")
+
+    structured = StructuredOutput(model)
+    run(
+        "json_normalization",
+        lambda: int(structured.finish("", MESSY_RESUME_RESPONSE, Resume, "benchmark") is not None),
+        "documents"
+    )
+    prompt = generator._resume_generation_prompt(base_resume, job)
+    run("resume_generation", lambda: int(generator.resume_creation(prompt) is not None), "resumes")
+
+    # Structured calls through the recommended wrapping; every repeat after
+    # the first must be a cache hit
+    from backend.cache import CachedModel, ResponseCache
+    from backend.tracing import TracedModel
+    cached_backend = FakeModel(canned_responder, latency=args.latency, token_latency=args.token_latency)
+    cached_generator = ResumeGenerator(TracedModel(CachedModel(
+        cached_backend, ResponseCache(os.path.join(tmp, "responses.sqlite3"))
+    )))
+    run("cached_generation", lambda: int(cached_generator.resume_creation(prompt) is not None), "resumes")
+    if "skipped" not in results[-1]:
+        results[-1]["backend_calls"] = cached_backend.calls
+        if cached_backend.calls != 1:
+            raise RuntimeError(f"cached_generation reached the backend {cached_backend.calls} times, expected 1")
+
+    from backend.rendering import render_resume
+    run("pdf_rendering", lambda: len(render_resume(base_resume, "pdf")) and 1, "documents")
+    run("docx_rendering", lambda: len(render_resume(base_resume, "docx")) and 1, "documents")
+
+    try:
+        from backend.agent import EnhancedResumeGenerator, RevisionBudget
+        agent = EnhancedResumeGenerator(model, RevisionBudget(max_iterations=args.agent_iterations))
+    except ImportError as e:
+        results.append(_skipped("agent_iterations", f"missing dependency: {e.name}"))
+    else:
+        def run_agent() -> int:
+            agent.generate_ats_resume(base_resume, job)
+            # Count the initial generation as one round
+            return agent.last_run_stats["iterations"] + 1
+        run("agent_iterations", run_agent, "iterations")
+        if "skipped" not in results[-1]:
+            results[-1]["stop_reason"] = agent.last_run_stats["stop_reason"]
+            results[-1]["ats_score"] = agent.last_run_stats["ats_score"]
+
+    no_browser.close()
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return process.stdout.strip() or None
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> bool:
+    """Print best-time ratios against a baseline run; True if any stage regressed."""
+    with open(baseline_path) as f:
+        baseline = {r["stage"]: r for r in json.load(f)["stages"] if "skipped" not in r}
+
+    regressed = False
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        before = baseline.get(result["stage"])
+        if "skipped" in result or before is None:
+            continue
+        ratio = result["best_ms"] / before["best_ms"] if before["best_ms"] else 1.0
+        status = "ok"
+        if ratio > 1 + tolerance:
+            status = "REGRESSION"
+            regressed = True
+        elif ratio < 1 - tolerance:
+            status = "faster"
+        print(f"{result['stage']:<20} {before['best_ms']:9.2f} -> {result['best_ms']:9.2f} ms  x{ratio:5.2f}  {status}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="fake model seconds per streamed piece")
+    parser.add_argument("--pages", type=int, default=2, help="pages in the fixture resume PDF")
+    parser.add_argument("--html-kb", type=int, default=64, help="size of the fixture job page")
+    parser.add_argument("--agent-iterations", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with serve_pages({"/jobs/1": job_page(args.html_kb)}) as base_url:
+            results = run_stages(args, tmp, base_url)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "stages": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
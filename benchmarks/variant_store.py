@@ -0,0 +1,97 @@
+"""Size and speed benchmark for backend.variant_store.
+
+Stores many synthetic tailored variants of one base resume (skills
+reordered and extended, profile rewritten, one experience entry changed)
+and reports bytes stored against full JSON, write and materialization
+rates, and query latency.
+
+    python -m benchmarks.variant_store [--variants 100 1000 10000] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from backend.types import Resume
+from backend.variant_store import VariantStore
+from benchmarks.stages import BASE_RESUME, JOB_SKILLS
+
+
+def make_variants(base: Resume, count: int, seed: int = 0) -> list[tuple[str, Resume]]:
+    rng = random.Random(seed)
+    data = base.model_dump(mode="json")
+    variants = []
+    for i in range(count):
+        skills = list(data["skills"])
+        rng.shuffle(skills)
+        focus = rng.sample(JOB_SKILLS, 3)
+        experience = list(data["experience"])
+        company = next(iter(experience[0]))
+        experience[0] = {company: f"{experience[0][company]}, using {focus[0]} and {focus[1]}"}
+        variants.append((f"https://jobs.example.com/{i}", Resume.model_validate({
+            **data,
+            "skills": focus + [skill for skill in skills if skill not in focus],
+            "profile": f"{data['profile']} Focused on {', '.join(focus)}.",
+            "experience": experience,
+        })))
+    return variants
+
+
+def measure(count: int) -> dict:
+    base = Resume.model_validate(BASE_RESUME)
+    variants = make_variants(base, count)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VariantStore(os.path.join(tmp, "variants.sqlite3"))
+        base_id = store.put_base(base)
+        start = time.perf_counter()
+        store.put_many(base_id, variants)
+        put_s = time.perf_counter() - start
+
+        ids = [variant_id for variant_id, _ in variants]
+        start = time.perf_counter()
+        store.get_many(ids)
+        get_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = store.find(skill=JOB_SKILLS[0], change="added")
+        find_s = time.perf_counter() - start
+
+        stats = store.stats()
+        store.close()
+    return {
+        "variants": count,
+        "stored_kb": stats["stored_bytes"] / 1e3,
+        "full_kb": stats["full_bytes"] / 1e3,
+        "ratio": stats["ratio"],
+        "put_per_s": count / put_s,
+        "get_per_s": count / get_s,
+        "find_ms": find_s * 1000,
+        "find_matches": len(matches),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--variants", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.variants:
+        result = measure(count)
+        results.append(result)
+        print(
+            f"{count:>6} variants {result['stored_kb']:9.1f} kB stored / {result['full_kb']:9.1f} kB full "
+            f"({result['ratio']:5.1f}x)  put {result['put_per_s']:8.0f}/s  get {result['get_per_s']:8.0f}/s  "
+            f"find {result['find_ms']:6.2f} ms"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()